@@ -1,24 +1,36 @@
 # Import necessary libraries and modules
-from flask import Flask, render_template, request, redirect, url_for  # Flask framework and utilities
+from flask import Flask, render_template, request, redirect, url_for, jsonify, Response, make_response, copy_current_request_context, g  # Flask framework and utilities
 import os  # Operating system interfaces
-import random  # Generate random numbers
-import numpy as np  # Numerical operations
-import pandas as pd  # Data manipulation and analysis
-from sklearn.linear_model import LinearRegression  # Linear regression model
-from sklearn.metrics import mean_squared_error  # Evaluation metric
-import matplotlib  # Plotting library
-matplotlib.use('Agg')  # Use non-interactive backend for web compatibility
-import matplotlib.pyplot as plt  # Plotting interface
-import seaborn as sns  # Statistical data visualization
-from rich.console import Console  # Rich library for enhanced console output
-from rich.table import Table  # Rich library for table formatting
-from rich.panel import Panel  # Rich library for panel formatting
+import json  # Serialise streamed batch results
+import hashlib  # Content hashes for cached chart filenames
+import re  # Recognise cached chart filenames on disk
+import math  # Reject non-finite numbers in submitted settings
+from collections import OrderedDict  # LRU ordering for the chart cache
+import threading  # Locks for state shared between request threads
+import functools  # Memoise rendered output
+import dataclasses  # Copy cached results with per-request fields
+import time  # Job timestamps
+import uuid  # Job identifiers
+from concurrent.futures import ThreadPoolExecutor  # Background job workers
+import charts  # Thread-safe chart rendering (loads the plotting stack on first use)
+import metrics  # Counters and histograms exposed on /metrics
+import results  # Structured feature results (HTML partials, JSON or Rich)
+
+# The numeric, plotting and Rich libraries are imported inside the functions that use them,
+# so the app starts quickly and features that don't need them (such as Eco-Tips) never load them.
+# Rich is only loaded when a client explicitly asks for the console-style report (format=rich).
 
 # Initialize the Flask application
 app = Flask(__name__)
 
+# Chart render workers are spawned processes, and under "python app.py" each one re-imports this script
+# as __mp_main__ before it can run a render. They only need charts.py, so the start-up work below that
+# touches shared state (adopting the chart directory, warm-up, starting pools) is skipped there.
+RENDER_WORKER = __name__ == "__mp_main__"  # True inside a spawned chart render worker
+
 # Historical Data Section
 # This section contains environmental details for different crops
+# (seed data: written to the data store the first time the app runs without one)
 historical_data = {
     "wheat": {
         "yield": [300, 320, 290, 310, 315],  # Yield data over years
@@ -44,30 +56,39 @@ historical_data = {
 
 # Regional Data Section
 # This section contains water-related data for different regions
+# (seed data: written to the data store the first time the app runs without one)
 regional_data = {
     "north": {
         "rainfall": 1000,  # Annual rainfall in mm
         "climate": "temperate",  # Climate type
         "avg_temp": 15,  # Average temperature in °C
-        "seasonal_variation": [200, 300, 250, 250]  # Rainfall distribution across seasons
+        "seasonal_variation": [200, 300, 250, 250],  # Rainfall distribution across seasons
+        "lat": 47.0,  # Region centre latitude in degrees
+        "lon": -100.0,  # Region centre longitude in degrees
     },
     "south": {
         "rainfall": 500,
         "climate": "arid",
         "avg_temp": 28,
-        "seasonal_variation": [100, 120, 130, 150]
+        "seasonal_variation": [100, 120, 130, 150],
+        "lat": 31.0,
+        "lon": -99.0,
     },
     "east": {
         "rainfall": 800,
         "climate": "humid",
         "avg_temp": 20,
-        "seasonal_variation": [210, 220, 190, 180]
+        "seasonal_variation": [210, 220, 190, 180],
+        "lat": 38.0,
+        "lon": -78.0,
     },
     "west": {
         "rainfall": 600,
         "climate": "semi-arid",
         "avg_temp": 22,
-        "seasonal_variation": [150, 160, 145, 145]
+        "seasonal_variation": [150, 160, 145, 145],
+        "lat": 39.0,
+        "lon": -117.0,
     },
 }
 
@@ -76,69 +97,570 @@ visuals_dir = os.path.join('static', 'visuals')  # Define the path for saving vi
 if not os.path.exists(visuals_dir):  # Check if the directory exists
     os.makedirs(visuals_dir)  # Create the directory if it doesn't exist
 
+# Metrics Section
+# Hot-path stages are timed into Prometheus histograms and every feature request is counted, along with
+# its errors; everything is served on /metrics. Each timer is a clock read and a bucket increment, so the
+# instrumentation stays on all the time. Values are per process.
+app_metrics = metrics.MetricsRegistry()  # Shared metrics for this process
+known_features = {"1", "2", "3", "4", "5"}  # Feature labels (anything else is reported as "other")
+
+def stage_timer(stage):
+    # Time a block of work as one hot-path stage
+    return app_metrics.timer("tsa_stage_duration_seconds", "Time spent in each hot-path stage.", stage=stage)
+
+def count_error(feature, kind):
+    # Count a failed feature request; kind is "exception", "validation" or "not_found"
+    app_metrics.inc("tsa_errors_total", "Feature requests that failed, by feature and kind.", feature=feature, kind=kind)
+
+# Data Store Section
+# Crop history and regional data are read from a memory-mapped columnar store (see data_store.py),
+# so large datasets are shared between worker processes instead of being loaded into each one.
+DATA_STORE_DIR = os.environ.get("DATA_STORE_DIR", "data")  # Directory holding the store
+_data_store = None  # Opened on first use, since it needs NumPy
+_data_store_lock = threading.Lock()  # Make sure the store is opened (or seeded) only once
+
+def get_data_store():
+    # Return the shared data store, opening it (and seeding it from the dictionaries above) on first use
+    global _data_store
+    store = _data_store
+    if store is not None:
+        return store
+    with _data_store_lock:
+        if _data_store is None:
+            from data_store import DataStore  # Columnar store (imports NumPy)
+            _data_store = DataStore.open_or_seed(DATA_STORE_DIR, historical_data, regional_data)
+        return _data_store
+
+# Data Version Section
+# The regional data carries a version number that is bumped whenever the store is reloaded (see
+# reload_shared_state), so anything derived from it (cached results, the region index) is rebuilt
+regional_data_version = 0  # Current version of the regional data
+
+# Region Lookup Section
+# Farms can be located by latitude/longitude instead of a region name. Region centres are indexed in a
+# KD-tree (see spatial.py) that is built once per regional data version and shared by every request, so
+# resolving a location stays sub-millisecond with thousands of regions. With more than one neighbour the
+# k nearest regions are blended, weighted by inverse distance.
+REGION_MAX_NEIGHBORS = 16  # Most regions blended for one location
+_region_locator = None  # (store, data version, RegionLocator) for the current regional data
+_region_locator_lock = threading.Lock()  # Make sure each version's index is built only once
+
+def get_region_locator():
+    # Return the spatial index for the current regional data, building it when the regions have changed
+    global _region_locator
+    store = get_data_store()
+    cached = _region_locator
+    if cached is not None and cached[0] is store and cached[1] == regional_data_version:
+        return cached[2]
+    with _region_locator_lock:
+        if _region_locator is None or _region_locator[0] is not store or _region_locator[1] != regional_data_version:
+            from spatial import RegionLocator  # Spatial index (imports NumPy, and SciPy when available)
+            version = regional_data_version
+            _region_locator = (store, version, RegionLocator(*store.region_coordinates()))
+        return _region_locator[2]
+
+def resolve_location(lat, lon, neighbors=1):
+    # Resolve a farm location to (name, region_info, location): the nearest region's data, or an
+    # inverse-distance blend of the k nearest. location records the point and the regions used
+    from spatial import idw_weights  # Inverse-distance weights
+    with stage_timer("region_lookup"):
+        nearest = get_region_locator().nearest(lat, lon, neighbors)
+    if not nearest:
+        raise LookupError("No regions have coordinates to search.")
+    store = get_data_store()
+    weights = idw_weights([distance for _, distance in nearest])
+    location = {
+        "lat": lat,
+        "lon": lon,
+        "neighbors": [
+            {"region": name, "distance_km": distance, "weight": weight}
+            for (name, distance), weight in zip(nearest, weights)
+        ],
+    }
+    infos = [store.region(name) for name, _ in nearest]
+    if len(infos) == 1 or max(weights) == 1.0:  # A single region (or an exact hit) needs no blending
+        name = nearest[weights.index(max(weights))][0]
+        return name, store.region(name), location
+
+    blended = {
+        "rainfall": sum(weight * info["rainfall"] for weight, info in zip(weights, infos)),
+        "climate": infos[0]["climate"],  # Categorical, so taken from the nearest region
+        "avg_temp": sum(weight * info["avg_temp"] for weight, info in zip(weights, infos)),
+        "seasonal_variation": [
+            sum(weight * info["seasonal_variation"][season] for weight, info in zip(weights, infos))
+            for season in range(len(infos[0]["seasonal_variation"]))
+        ],
+        "lat": lat,
+        "lon": lon,
+    }
+    return "-".join(name for name, _ in nearest), blended, location
+
+# Model Registry Section
+# Fitting a regression on every request dominates Feature 1, yet the fit only depends on the crop's history.
+# For each crop the registry keeps the least-squares sufficient statistics (XᵀX, Xᵀy, yᵀy and the row count)
+# with X = [1, water_use, fertilizer]. Coefficients, training RMSE and the historical means all follow from
+# those sums, so new observations are folded in with O(features²) work per row, however long the history is.
+# Statistics for the stored history and for ingested observations are kept apart and added when solving:
+# a crop is only re-read from the data store after the store is reloaded, and ingested rows are appended
+# to an on-disk observation log rather than kept in memory, so nothing grows with the number of rows.
+# Every worker process folds in rows that other workers logged before it answers, so ingestion is shared.
+class ModelRegistry:
+    def __init__(self):
+        self._models = {}  # Stored-history statistics and solved model keyed by crop name
+        self._observed = {}  # Statistics of logged observations keyed by crop name
+        self._log = None  # Observation log, opened on first use
+        self._lock = threading.Lock()  # Serialise fits, updates and counter changes across request threads
+        self.hits = 0  # Requests served from a cached model
+        self.misses = 0  # Requests that needed a fresh fit
+        self.observations = 0  # Observations folded in since start-up
+
+    @staticmethod
+    def _empty_stats():
+        import numpy as np  # Numerical operations
+        return {"n": 0, "xtx": np.zeros((3, 3)), "xty": np.zeros(3), "yty": 0.0}
+
+    @staticmethod
+    def _accumulate(stats, yields, water_use, fertilizer):
+        # Add rows to the running sums in place
+        import numpy as np  # Numerical operations
+        X = np.column_stack([np.ones(len(yields)), water_use, fertilizer])  # Intercept, water_use and fertilizer
+        y = np.asarray(yields, dtype=float)  # Target variable: yield
+        stats["n"] += len(y)
+        stats["xtx"] += X.T @ X
+        stats["xty"] += X.T @ y
+        stats["yty"] += float(y @ y)
+
+    def _observation_log(self):
+        # The shared on-disk log of ingested observations (caller holds the lock)
+        if self._log is None:
+            from data_store import ObservationLog  # Append-only per-crop row files
+            self._log = ObservationLog(os.path.join(get_data_store().path, "observations"))
+        return self._log
+
+    def _sync(self, crop):
+        # Fold rows logged for a crop since the last sync into its observation statistics (caller holds the lock)
+        log = self._observation_log()
+        observed = self._observed.get(crop)
+        identity, rows = log.stat(crop)  # Other worker processes append to the same log
+        if observed is None or observed["identity"] != identity or rows < observed["rows"]:  # First use, or the log was replaced
+            observed = self._observed[crop] = dict(self._empty_stats(), rows=0, identity=identity)
+        if rows > observed["rows"]:
+            for start in range(observed["rows"], rows, INGEST_CHUNK):  # Bounded memory however long the log is
+                chunk = log.read(crop, start, min(start + INGEST_CHUNK, rows))
+                self._accumulate(observed, chunk[:, 0], chunk[:, 1], chunk[:, 2])
+            observed["rows"] = rows
+        return observed
+
+    def _fit(self, crop):
+        # Build the sufficient statistics for one crop from its stored history
+        entry = dict(self._empty_stats(), model=None, observed_rows=None)
+        if get_data_store().has_crop(crop):  # Crops may also exist only through ingested observations
+            with stage_timer("data_load"):
+                crop_hist = get_data_store().crop_history(crop)  # Column views into the memory-mapped store
+            # The soil_quality column used to be appended here, but it is constant within a fit,
+            # so it only ever shifted the intercept and its coefficient was always zero
+            self._accumulate(entry, crop_hist["yield"], crop_hist["water_use"], crop_hist["fertilizer"])
+        return entry
+
+    @staticmethod
+    def _solve(entry, observed):
+        # Ordinary least squares from the running sums (lstsq also copes with degenerate histories)
+        import numpy as np  # Numerical operations
+        n = entry["n"] + observed["n"]
+        xtx, xty = entry["xtx"] + observed["xtx"], entry["xty"] + observed["xty"]
+        beta = np.linalg.lstsq(xtx, xty, rcond=None)[0]  # [intercept, water_use, fertilizer]
+        sse = entry["yty"] + observed["yty"] - 2 * float(beta @ xty) + float(beta @ xtx @ beta)  # Residual sum of squares
+        return {
+            "coef": beta[1:].copy(),  # Coefficients for [water_use, fertilizer]
+            "intercept": float(beta[0]),  # Model intercept
+            "rmse": float(np.sqrt(max(sse, 0.0) / n)),  # Training root mean squared error
+            "mean_water": float(xtx[0, 1] / n),  # Historical average water usage
+            "mean_fertilizer": float(xtx[0, 2] / n),  # Historical average fertilizer usage
+            "observations": n,  # Rows the model was fitted on
+        }
+
+    def _current(self, crop):
+        # The solved model for a crop and whether its statistics had to be rebuilt (caller holds the lock)
+        entry = self._models.get(crop)
+        fitted = entry is None
+        if fitted:  # Statistics are missing, or were dropped when the store was reloaded
+            with stage_timer("model_fit"):
+                entry = self._models[crop] = self._fit(crop)
+        observed = self._sync(crop)
+        if entry["model"] is None or entry["observed_rows"] != observed["rows"]:
+            with stage_timer("model_solve"):
+                entry["model"] = self._solve(entry, observed)  # Only after new observations or a fresh fit
+            entry["observed_rows"] = observed["rows"]
+        return entry["model"], fitted
+
+    def has_crop(self, crop_type):
+        # Whether a crop has stored history or ingested observations
+        crop = crop_type.lower()
+        if get_data_store().has_crop(crop):
+            return True
+        with self._lock:
+            return self._observation_log().has_crop(crop)
+
+    def crops(self):
+        # Every crop with stored history or ingested observations
+        with self._lock:
+            logged = self._observation_log().crops()
+        return sorted(set(get_data_store().crops()) | set(logged))
+
+    def get(self, crop_type):
+        # Return the model for a crop, fitting it first if missing or stale
+        crop = crop_type.lower()
+        if not self.has_crop(crop):
+            raise KeyError(crop)
+        with self._lock:
+            model, fitted = self._current(crop)
+            if fitted:
+                self.misses += 1
+            else:
+                self.hits += 1  # Cached statistics are still current
+            return model
+
+    def refit(self, crop_type):
+        # Fit a crop from scratch (stored history plus logged observations), leaving the cache and counters alone
+        crop = crop_type.lower()
+        with self._lock:
+            return self._solve(self._fit(crop), self._sync(crop))
+
+    def observe(self, crop_type, yields, water_use, fertilizer):
+        # Record new observations for a crop and fold them into its model straight away
+        import numpy as np  # Numerical operations
+        crop = crop_type.lower()
+        rows = np.column_stack([
+            np.asarray(yields, dtype=float), np.asarray(water_use, dtype=float), np.asarray(fertilizer, dtype=float),
+        ])
+        with self._lock:
+            self._observation_log().append(crop, rows)  # Persisted, so a refit or restart keeps them
+            self._sync(crop)  # O(rows) update of the running sums
+            self.observations += len(rows)
+
+    def invalidate(self, crop_type=None):
+        # Forget the cached model for one crop, or everything (including the observation log handle) when none is given
+        with self._lock:
+            if crop_type is None:
+                self._models.clear()
+                self._observed.clear()
+                self._log = None  # The data store (and its log) may have moved
+            else:
+                self._models.pop(crop_type.lower(), None)
+
+    def warm(self):
+        # Fit every crop up front so the first requests are already warm (not counted as hits or misses)
+        for crop in self.crops():
+            with self._lock:
+                self._current(crop)
+
+    def stats(self):
+        # Snapshot of the cache counters and the crops currently cached
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "observations": self.observations,
+                "cached_crops": sorted(self._models),
+            }
+
+model_registry = ModelRegistry()  # Shared registry used by every request
+
+def predict_yield(model, fertilizer_level, irrigation_eff):
+    # Predict yield from a cached crop model; works on scalars and on NumPy arrays of scenarios alike
+    avg_water = model["mean_water"] * (1 - (1 - irrigation_eff) * 0.02)  # Average water usage adjusted for irrigation efficiency
+    avg_fert = model["mean_fertilizer"] + fertilizer_level  # Adjusted fertilizer
+    return model["coef"][0] * avg_water + model["coef"][1] * avg_fert + model["intercept"]
+
 # Feature 1: Crop Efficiency Planner
 def crop_efficiency_web(crop_type, soil_quality, farm_size, fertilizer_level, irrigation_eff):
-    # Create a new Console instance for this request
-    console = Console(record=True)
-    console.print(Panel("[bold blue]Advanced Crop Efficiency Planner[/bold blue]"))  # Display header panel
+    result = results.CropEfficiencyResult(crop=crop_type.lower(), farm_size=farm_size)
     try:
         # Check if the crop type exists in historical data
-        if crop_type.lower() not in historical_data:
-            available_crops = ', '.join(historical_data.keys())  # List available crops
-            console.print(f"[red]Error: Crop type '{crop_type}' not found! Available: {available_crops}[/]")  # Display error
-            return console.export_html()  # Return error message as HTML
-
-        # Retrieve historical data for the selected crop
-        crop_hist = historical_data[crop_type.lower()]
-        df = pd.DataFrame({
-            "yield": crop_hist["yield"],
-            "water_use": crop_hist["water_use"],
-            "fertilizer": crop_hist["fertilizer"],
-        })  # Create DataFrame from historical data
-
-        # Prepare data for linear regression
-        X = df[["water_use", "fertilizer"]].values  # Features: water_use and fertilizer
-        X = np.hstack([X, np.full((X.shape[0], 1), soil_quality * 0.1)])  # Add soil_quality as a feature
-        y = np.array(df["yield"])  # Target variable: yield
-
-        model = LinearRegression()  # Initialize linear regression model
-        model.fit(X, y)  # Fit the model to the data
-
-        # Calculate average water usage adjusted for irrigation efficiency
-        avg_water = np.mean(crop_hist["water_use"]) * (1 - (1 - irrigation_eff) * 0.02)
-        avg_fert = np.mean(crop_hist["fertilizer"]) + fertilizer_level  # Calculate adjusted fertilizer
-        features = np.array([[avg_water, avg_fert, soil_quality * 0.1]])  # Prepare feature array
-
-        predicted_yield = model.predict(features)[0]  # Predict yield
-        rmse = np.sqrt(mean_squared_error(y, model.predict(X)))  # Calculate RMSE
-        conf_interval = (predicted_yield - 1.96 * rmse, predicted_yield + 1.96 * rmse)  # 95% confidence interval
-
-        # Display the results using Rich
-        console.print(f"[bold cyan]Optimized Planting Layout:[/bold cyan] {farm_size:.2f} acres of {crop_type.capitalize()}")
-        console.print(f"[bold cyan]Predicted Yield:[/bold cyan] {predicted_yield:.2f} units")
-        console.print(f"[bold cyan]95% Confidence Interval:[/bold cyan] ({conf_interval[0]:.2f}, {conf_interval[1]:.2f})")
-        console.print("[bold magenta]Recommendations:[/bold magenta]")
-        console.print("- Adjust fertilizer input as per soil nutrient testing.")
-        console.print("- Consider micro-irrigation to boost water efficiency.")
-        console.print("- Regularly update historical data for better predictions.")
+        if not model_registry.has_crop(crop_type.lower()):
+            result.available_crops = model_registry.crops()  # List available crops
+            result.error = f"Error: Crop type '{crop_type}' not found! Available: {', '.join(result.available_crops)}"
+            count_error("1", "not_found")  # Count the failed lookup
+            return result
+
+        # Retrieve the fitted model for the selected crop (fitted once per store load)
+        model = model_registry.get(crop_type)
+
+        with stage_timer("prediction"):
+            predicted_yield = float(predict_yield(model, fertilizer_level, irrigation_eff))  # Predict yield
+        rmse = model["rmse"]  # Training RMSE cached with the model
+        result.predicted_yield = predicted_yield
+        result.conf_interval = [predicted_yield - 1.96 * rmse, predicted_yield + 1.96 * rmse]  # 95% confidence interval
+        result.recommendations = [
+            "Adjust fertilizer input as per soil nutrient testing.",
+            "Consider micro-irrigation to boost water efficiency.",
+            "Regularly update historical data for better predictions.",
+        ]
     except Exception as e:
         # Handle any exceptions that occur during processing
-        console.print(f"[red]An error occurred: {str(e)}[/]")
+        result.error = f"An error occurred: {str(e)}"
+        count_error("1", "exception")  # Count the failure
+    return result
 
-    rich_output = console.export_html()  # Export the Rich output to HTML
-    console.clear()  # Clear the console after exporting
-    return rich_output  # Return the HTML output
+# Optimizer Section
+# Recommends fertilizer and irrigation settings: a dense grid of candidate settings is scored against the
+# crop's model in one broadcast NumPy evaluation, and the Pareto front of yield against water and
+# fertilizer use is read off the grid with a running 2-D maximum, so ~100k candidates take milliseconds.
+OPTIMIZER_GRID = int(os.environ.get("OPTIMIZER_GRID", 316))  # Grid points per setting (316 x 316 is ~100k candidates)
+OPTIMIZER_MAX_GRID = 2000  # Largest grid accepted per setting
+OPTIMIZER_FERTILIZER_MAX = 50.0  # Default upper bound on additional fertilizer (kg/acre)
+OPTIMIZER_IRRIGATION_RANGE = (0.5, 1.0)  # Irrigation efficiencies considered
+OPTIMIZER_MAX_FRONT = 200  # Most front points reported (evenly thinned beyond this)
+
+def water_applied(model, irrigation_eff):
+    # Water delivered to the field per acre: the water the model expects the crop to use, divided by the
+    # efficiency with which irrigation gets it there. Works on scalars and NumPy arrays alike
+    return model["mean_water"] * (1 - (1 - irrigation_eff) * 0.02) / irrigation_eff
+
+def optimize_settings(model, farm_size, fertilizer_max=OPTIMIZER_FERTILIZER_MAX, irrigation_range=OPTIMIZER_IRRIGATION_RANGE, grid=OPTIMIZER_GRID):
+    # Score every (fertilizer, irrigation) pair on a grid and return the Pareto-optimal settings,
+    # ordered by fertilizer then water use, with totals scaled to the farm size
+    import numpy as np  # Numerical operations
+    fertilizer = np.linspace(0.0, fertilizer_max, grid)  # Ascending fertilizer use
+    irrigation = np.linspace(irrigation_range[0], irrigation_range[1], grid)
+    water = water_applied(model, irrigation)
+    order = np.argsort(water, kind="stable")  # Columns by ascending water use
+    irrigation, water = irrigation[order], water[order]
+
+    yields = predict_yield(model, fertilizer[:, None], irrigation[None, :])  # (fertilizer, irrigation) yield matrix
+
+    # A setting is dominated when another one using no more fertilizer and no more water yields at least
+    # as much. Rows and columns are sorted by use, so that is the running maximum over the rectangle above
+    # and to the left of each cell, excluding the cell itself
+    best = np.maximum.accumulate(np.maximum.accumulate(yields, axis=0), axis=1)
+    dominating = np.full_like(yields, -np.inf)
+    dominating[1:, :] = best[:-1, :]
+    dominating[:, 1:] = np.maximum(dominating[:, 1:], best[:, :-1])
+    rows, columns = np.nonzero(yields > dominating)
+
+    if len(rows) > OPTIMIZER_MAX_FRONT:  # Keep the ends of the front and evenly spaced points between
+        keep = np.unique(np.linspace(0, len(rows) - 1, OPTIMIZER_MAX_FRONT).round().astype(int))
+        rows, columns = rows[keep], columns[keep]
+
+    front_yield = yields[rows, columns]
+    front = [
+        {
+            "fertilizer_level": f, "irrigation_eff": e, "predicted_yield": y, "water_use": w,
+            "total_yield": y * farm_size, "total_fertilizer": f * farm_size, "total_water": w * farm_size,
+        }
+        for f, e, y, w in zip(fertilizer[rows].tolist(), irrigation[columns].tolist(), front_yield.tolist(), water[columns].tolist())
+    ]
+    top = front[int(np.argmax(front_yield))] if front else None  # Highest-yielding setting in range
+    return {"candidates": int(yields.size), "front": front, "best": top}
+
+def crop_optimizer_web(crop_type, farm_size, fertilizer_level, irrigation_eff, fertilizer_max=None, grid=OPTIMIZER_GRID):
+    result = results.OptimizationResult(crop=crop_type.lower(), farm_size=farm_size)
+    try:
+        # Check if the crop type exists in historical data
+        if not model_registry.has_crop(crop_type.lower()):
+            result.available_crops = model_registry.crops()  # List available crops
+            result.error = f"Error: Crop type '{crop_type}' not found! Available: {', '.join(result.available_crops)}"
+            count_error("1", "not_found")  # Count the failed lookup
+            return result
+
+        model = model_registry.get(crop_type)
+        if fertilizer_max is None:
+            fertilizer_max = max(OPTIMIZER_FERTILIZER_MAX, fertilizer_level)  # Always include the current setting's range
+        with stage_timer("optimization"):
+            optimum = optimize_settings(model, farm_size, fertilizer_max, OPTIMIZER_IRRIGATION_RANGE, grid)
+        result.candidates = optimum["candidates"]
+        result.front = optimum["front"]
+        result.best = optimum["best"]
+
+        # The setting that was entered, for comparison
+        current_yield = float(predict_yield(model, fertilizer_level, irrigation_eff))
+        current_water = float(water_applied(model, irrigation_eff))
+        result.current = {
+            "fertilizer_level": fertilizer_level, "irrigation_eff": irrigation_eff,
+            "predicted_yield": current_yield, "water_use": current_water,
+            "total_yield": current_yield * farm_size, "total_fertilizer": fertilizer_level * farm_size,
+            "total_water": current_water * farm_size,
+        }
+    except Exception as e:
+        # Handle any exceptions that occur during processing
+        result.error = f"An error occurred: {str(e)}"
+        count_error("1", "exception")  # Count the failure
+    return result
+
+# Chart Cache Section
+# Water simulation charts are content-addressed: the filename is a hash of every input that affects
+# the picture, so concurrent users never overwrite each other, repeat requests skip rendering,
+# and the least recently used charts are deleted once the cache grows past its limits.
+CHART_CACHE_MAX_ENTRIES = int(os.environ.get("CHART_CACHE_MAX_ENTRIES", 256))  # Most charts kept on disk
+CHART_CACHE_MAX_BYTES = int(os.environ.get("CHART_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # Most bytes kept on disk
+CHART_STYLE_VERSION = 1  # Bump when the chart's look changes so old renders are not reused
+DEFAULT_SIMULATION_SEED = 0  # Seed used when the form leaves it blank, so repeat requests hit the cache
+
+CHART_PREFIX_MAX = 40  # Longest region slug kept in a chart filename
+
+class ChartCache:
+    filename_pattern = re.compile(r"^[a-z0-9_-]+_water_simulation_([0-9a-f]{32})\.png$")  # Cached chart filenames
+
+    @staticmethod
+    def slug(prefix):
+        # Filename-safe, bounded form of a region name (the key alone identifies the chart)
+        return re.sub(r"[^a-z0-9]+", "-", prefix.lower()).strip("-")[:CHART_PREFIX_MAX].strip("-") or "chart"
+
+    def __init__(self, directory, max_entries, max_bytes):
+        self.directory = directory  # Where chart files are written
+        self.max_entries = max_entries  # Count limit before eviction
+        self.max_bytes = max_bytes  # Size limit before eviction
+        self._entries = OrderedDict()  # Key -> (filename, size), least recently used first
+        self._bytes = 0  # Total size of cached files
+        self._lock = threading.Lock()  # Guard the index against concurrent requests
+        self.hits = 0  # Requests served from an existing file
+        self.misses = 0  # Requests that had to render
+        self.evictions = 0  # Files deleted to stay within the limits
+        self._adopt_existing()
+
+    @staticmethod
+    def make_key(*parts):
+        # Hash every input that affects the chart into a stable cache key
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+    def _adopt_existing(self):
+        # Index charts left over from a previous run (oldest first) so they count toward the limits
+        found = []
+        for filename in os.listdir(self.directory):
+            match = self.filename_pattern.match(filename)
+            if match:
+                path = os.path.join(self.directory, filename)
+                found.append((os.path.getmtime(path), match.group(1), filename, os.path.getsize(path)))
+        with self._lock:
+            for _, key, filename, size in sorted(found):
+                self._entries[key] = (filename, size)
+                self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        # Delete least recently used charts until both limits are met (caller holds the lock)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (filename, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass  # Already gone
+
+    def get_or_render(self, key, prefix, render):
+        # Return the filename for a key, calling render(path) to draw it only on a cache miss
+        filename = f"{self.slug(prefix)}_water_simulation_{key}.png"  # Always matches filename_pattern
+        path = os.path.join(self.directory, filename)
+        with self._lock:
+            if key in self._entries and os.path.exists(path):
+                self._entries.move_to_end(key)  # Mark as most recently used
+                self.hits += 1
+                return filename
+            self.misses += 1
+
+        # Render outside the lock into a private temporary file, then move it into place atomically
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            render(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)  # Don't leave a partial render behind
+            raise
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]  # Another request rendered the same chart meanwhile
+            size = os.path.getsize(path)
+            self._entries[key] = (filename, size)
+            self._bytes += size
+            self._evict()
+        return filename
+
+    def stats(self):
+        # Snapshot of the cache counters and current usage
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+chart_cache = None if RENDER_WORKER else ChartCache(visuals_dir, CHART_CACHE_MAX_ENTRIES, CHART_CACHE_MAX_BYTES)  # Shared chart cache (never indexed or evicted from a render worker)
+
+CHART_RENDER_WORKERS = int(os.environ.get("CHART_RENDER_WORKERS", 0))  # Render processes (0 renders in the request thread)
+chart_renderer = charts.ChartRenderer(CHART_RENDER_WORKERS)  # Shared renderer, optionally backed by a process pool
+
+# Water Simulation Section
+# Every simulated year is one row of a (trajectories, 12) array, so a Monte Carlo ensemble of thousands
+# of years is drawn in a handful of NumPy calls rather than a Python loop per month.
+ENSEMBLE_MAX_TRAJECTORIES = int(os.environ.get("ENSEMBLE_MAX_TRAJECTORIES", 100000))  # Largest ensemble accepted
+
+def simulate_water_year(seasonal_variation, irrigation_efficiency, soil_infiltration, trajectories=1, seed=DEFAULT_SIMULATION_SEED):
+    # Simulate monthly rainfall and water loss; returns two (trajectories, 12) arrays
+    import numpy as np  # Numerical operations
+    rng = np.random.default_rng(seed)  # Seeded generator so a given input always simulates the same years
+    monthly_rainfall = np.asarray(seasonal_variation, dtype=float)  # Seasonal rainfall data
+    if monthly_rainfall.size < 12:  # Ensure 12 months of data
+        monthly_rainfall = np.tile(monthly_rainfall, int(np.ceil(12 / monthly_rainfall.size)))[:12]  # Repeat data if necessary
+        rainfall = monthly_rainfall + rng.integers(-10, 10, (trajectories, 12))  # Add randomness to rainfall data
+    else:
+        rainfall = np.tile(monthly_rainfall[:12], (trajectories, 1))  # Already monthly, no noise added
+
+    base_loss = rng.uniform(10, 30, (trajectories, 12))  # Base water loss for every month of every year
+    losses = base_loss * (1 - irrigation_efficiency) * (1 - soil_infiltration)  # Adjust loss based on efficiencies
+    return rainfall, losses
+
+def summarize_ensemble(samples):
+    # Mean and p10/p50/p90 bands per month across the simulated years
+    import numpy as np  # Numerical operations
+    p10, p50, p90 = np.percentile(samples, [10, 50, 90], axis=0)
+    return {
+        "mean": samples.mean(axis=0).tolist(),
+        "p10": p10.tolist(),
+        "p50": p50.tolist(),
+        "p90": p90.tolist(),
+    }
+
+def record_chart_timings(timings):
+    # Record the plotting and savefig times measured wherever the chart was drawn (possibly a worker process)
+    for stage, seconds in timings.items():
+        app_metrics.histogram("tsa_stage_duration_seconds", "Time spent in each hot-path stage.", stage=stage).observe(seconds)
 
 # Feature 2: Water Management Tool
-def water_management_web(irrigation_method, soil_type, region):
-    # Create a new Console instance for this request
-    console = Console(record=True)
-    console.print(Panel("[bold blue]Enhanced Water Management Tool[/bold blue]"))  # Display header panel
+water_suggestions = [
+    "Consider scheduling irrigation during periods with low evaporation.",
+    "Upgrade to smart irrigation systems for real-time adjustments.",
+    "Use weather forecast data to further fine-tune irrigation schedules.",
+]
+
+def water_management_web(irrigation_method, soil_type, region, seed=DEFAULT_SIMULATION_SEED, trajectories=1, location=None):
+    # location, when given, is (lat, lon, neighbors) and replaces the region name
+    import numpy as np  # Numerical operations
+    result = results.WaterManagementResult(
+        region=(region or "").lower(), irrigation_method=irrigation_method, soil_type=soil_type, seed=seed, trajectories=trajectories,
+    )
     try:
-        # Check if the region exists in regional data
-        if region.lower() not in regional_data:
-            console.print(f"[red]Error: Region '{region}' not found![/]")
-            return console.export_html(), None  # Return error message and no visualization
+        store = get_data_store()
+        if location is not None:
+            # Resolve the farm's coordinates to the nearest region (or a blend of the nearest few)
+            region, region_info, result.location = resolve_location(*location)
+            result.region = region
+        elif store.has_region(region.lower()):  # Check if the region exists in regional data
+            region_info = store.region(region.lower())
+        else:
+            result.error = f"Error: Region '{region}' not found!"
+            count_error("2", "not_found")  # Count the failed lookup
+            return result
 
         # Define efficiency mappings
         irrigation_efficiency_map = {"drip": 0.95, "sprinkler": 0.85}  # Irrigation method efficiencies
@@ -148,111 +670,155 @@ def water_management_web(irrigation_method, soil_type, region):
         soil_infiltration = soil_infiltration_map.get(soil_type.lower(), 0.75)  # Get soil infiltration rate
 
         months = list(range(1, 13))  # List of months
-        monthly_rainfall = np.array(regional_data[region.lower()]["seasonal_variation"])  # Seasonal rainfall data
-        if monthly_rainfall.size < 12:  # Ensure 12 months of data
-            monthly_rainfall = np.tile(monthly_rainfall, int(np.ceil(12 / monthly_rainfall.size)))[:12]  # Repeat data if necessary
-            monthly_rainfall += np.random.randint(-10, 10, 12)  # Add randomness to rainfall data
-
-        water_losses = []
-        for m in months:
-            base_loss = random.uniform(10, 30)  # Base water loss for the month
-            adjusted_loss = base_loss * (1 - irrigation_efficiency) * (1 - soil_infiltration)  # Adjust loss based on efficiencies
-            water_losses.append(adjusted_loss)  # Append adjusted loss to list
-
-        # Set up the visualization using Seaborn and Matplotlib
-        sns.set_theme(style="whitegrid")
-        plt.figure(figsize=(10, 6))
-        plt.plot(months, monthly_rainfall, marker='o', label='Monthly Rainfall (mm)', color="#3498db")  # Plot rainfall
-        plt.plot(months, water_losses, marker='s', label='Simulated Water Loss (mm)', color="#e74c3c")  # Plot water loss
-        plt.title(f"Seasonal Water Usage Simulation - {region.capitalize()} Region", fontsize=16)  # Set plot title
-        plt.xlabel("Month", fontsize=14)  # X-axis label
-        plt.ylabel("Water (mm)", fontsize=14)  # Y-axis label
-        plt.legend()  # Show legend
-        plt.xticks(months)  # Set x-ticks to months
-        plt.tight_layout()  # Adjust layout
-
-        visualization_filename = f"{region.lower()}_water_simulation_enhanced.png"  # Define filename for visualization
-        visualization_path = os.path.join(visuals_dir, visualization_filename)  # Define full path
-        plt.savefig(visualization_path, dpi=150)  # Save the plot as a PNG file
-        plt.close()  # Close the plot to free memory
-
-        # Display the results using Rich
-        console.print(f"[bold cyan]Average Monthly Rainfall:[/bold cyan] {np.mean(monthly_rainfall):.2f} mm")
-        console.print(f"[bold cyan]Average Simulated Water Loss:[/bold cyan] {np.mean(water_losses):.2f} mm")
-        console.print(f"[bold cyan]Visualization saved to:[/bold cyan] {visualization_path}")  # Inform user about saved visualization
-        console.print("[bold magenta]Advanced Suggestions:[/bold magenta]")
-        console.print("- Consider scheduling irrigation during periods with low evaporation.")
-        console.print("- Upgrade to smart irrigation systems for real-time adjustments.")
-        console.print("- Use weather forecast data to further fine-tune irrigation schedules.")
+        with stage_timer("simulation"):
+            rainfall, losses = simulate_water_year(
+                region_info["seasonal_variation"], irrigation_efficiency, soil_infiltration, trajectories, seed,
+            )  # One row per simulated year
+
+        # Draw the chart only if this exact input has not been rendered before
+        cache_key = ChartCache.make_key(
+            CHART_STYLE_VERSION, region.lower(), region_info,
+            irrigation_method.lower(), soil_type.lower(), seed, trajectories,
+        )
+        result.months = months
+        result.average_rainfall = float(np.mean(rainfall))
+        result.average_loss = float(np.mean(losses))
+        if trajectories == 1:
+            result.rainfall = rainfall[0].tolist()
+            result.losses = losses[0].tolist()
+            render = lambda path: record_chart_timings(chart_renderer.render(
+                charts.render_water_chart, path, months, result.rainfall, result.losses, region,
+            ))
+        else:
+            rainfall_bands = summarize_ensemble(rainfall)  # Mean and percentile bands per month
+            loss_bands = summarize_ensemble(losses)
+            result.rainfall, result.losses = rainfall_bands["mean"], loss_bands["mean"]
+            result.rainfall_bands, result.loss_bands = rainfall_bands, loss_bands
+            # Spread of each simulated year's monthly average across the ensemble
+            result.rainfall_range = np.percentile(rainfall.mean(axis=1), [10, 90]).tolist()
+            result.loss_range = np.percentile(losses.mean(axis=1), [10, 90]).tolist()
+            render = lambda path: record_chart_timings(chart_renderer.render(
+                charts.render_water_ensemble_chart, path, months, rainfall_bands, loss_bands, region, trajectories,
+            ))
+        with stage_timer("chart_total"):
+            visualization_filename = chart_cache.get_or_render(cache_key, region.lower(), render)
+        result.visualization_url = url_for('static', filename=f'visuals/{visualization_filename}')  # Generate URL for visualization
+        result.suggestions = list(water_suggestions)
     except Exception as e:
         # Handle any exceptions that occur during processing
-        console.print(f"[red]An error occurred: {str(e)}[/]")
+        result.error = f"An error occurred: {str(e)}"
+        count_error("2", "exception")  # Count the failure
+    return result
 
-    rich_output = console.export_html()  # Export the Rich output to HTML
-    console.clear()  # Clear the console after exporting
+# Result Caching Section
+# Some features return the same result for the same arguments, so it is built once and reused, along with
+# its rendered HTML partial and Rich report (see render_result). A result carrying an error (a failed
+# lookup, an exception) is returned as it is but not stored, so the next request tries again instead of
+# repeating the failure until the cache is cleared.
+class _UncachedResult(Exception):
+    # Carries an error result out of lru_cache, which only stores values that are returned
+    def __init__(self, result):
+        super().__init__(result.error)
+        self.result = result
 
-    visualization_url = None  # Initialize visualization URL
-    if os.path.exists(visualization_path):  # Check if the visualization file exists
-        visualization_url = url_for('static', filename=f'visuals/{visualization_filename}')  # Generate URL for visualization
+def cache_results(maxsize):
+    # functools.lru_cache for feature functions, skipping results whose error is set
+    def decorator(function):
+        @functools.lru_cache(maxsize=maxsize)
+        def cached(*args):
+            result = function(*args)
+            if result.error:
+                raise _UncachedResult(result)
+            result._rendered = {}  # Output format -> rendered HTML, filled in by render_result
+            return result
 
-    return rich_output, visualization_url  # Return the output and visualization URL
+        @functools.wraps(function)
+        def wrapper(*args):
+            try:
+                return cached(*args)
+            except _UncachedResult as uncached:
+                return uncached.result
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.cache_info = cached.cache_info
+        return wrapper
+    return decorator
 
 # Feature 3: Localized Water Data
-def localized_water_data_web(region):
-    # Create a new Console instance for this request
-    console = Console(record=True)
-    console.print(Panel("[bold blue]Enhanced Localized Water Data[/bold blue]"))  # Display header panel
-    try:
-        # Check if the region exists in regional data
-        if region.lower() not in regional_data:
-            console.print(f"[red]Error: Region '{region}' not found![/]")  # Display error message
-            return console.export_html()  # Return error message as HTML
+def localized_water_data_web(region, location=None):
+    # location, when given, is (lat, lon, neighbors) and replaces the region name
+    if location is not None:
+        try:
+            name, region_info, resolved = resolve_location(*location)
+        except Exception as e:
+            # Handle any exceptions that occur during the lookup
+            count_error("3", "exception")  # Count the failure
+            return results.LocalizedWaterResult(error=f"An error occurred: {str(e)}")
+        if len(resolved["neighbors"]) == 1 or get_data_store().has_region(name):
+            result = localized_water_data_web(name)  # A single region: reuse its cached result
+        else:
+            result = _localized_water_data(name, region_info)  # Blends depend on the exact point, so aren't cached
+        return dataclasses.replace(result, location=resolved)
 
-        region_info = regional_data[region.lower()]  # Retrieve data for the selected region
-        console.print(f"[bold cyan]Region:[/bold cyan] {region.capitalize()}")  # Display region name
-        console.print(f"[bold cyan]Annual Rainfall:[/bold cyan] {region_info['rainfall']} mm")  # Display annual rainfall
-        console.print(f"[bold cyan]Climate:[/bold cyan] {region_info['climate'].capitalize()}")  # Display climate type
-        console.print(f"[bold cyan]Average Temperature:[/bold cyan] {region_info['avg_temp']} °C")  # Display average temperature
+    # The result is a pure function of the region's data, so known regions are built once per data version
+    if get_data_store().has_region(region.lower()):
+        return _cached_localized_water_data(region.lower(), regional_data_version)
+    return _localized_water_data(region)  # Unknown regions are not cached
 
-        console.print("[bold cyan]Seasonal Rainfall Distribution (mm):[/bold cyan]")  # Display section header
-        seasons = ["Spring", "Summer", "Autumn", "Winter"]  # Define seasons
-        table = Table(show_header=True, header_style="bold magenta")  # Initialize Rich table
-        table.add_column("Season")  # Add Season column
-        table.add_column("Rainfall (mm)", justify="right")  # Add Rainfall column
+@cache_results(maxsize=1024)
+def _cached_localized_water_data(region, version):
+    # The version argument is only part of the cache key: a new data version means a fresh result
+    return _localized_water_data(region)
 
-        for season, rain in zip(seasons, region_info["seasonal_variation"]):  # Populate table with seasonal data
-            table.add_row(season, str(rain))  # Add a row for each season
+def _localized_water_data(region, region_info=None):
+    # region_info, when given, is used instead of the stored region (e.g. a blend of nearby regions)
+    result = results.LocalizedWaterResult(region=region.lower())
+    try:
+        # Check if the region exists in regional data
+        store = get_data_store()
+        if region_info is None and not store.has_region(region.lower()):
+            result.error = f"Error: Region '{region}' not found!"
+            count_error("3", "not_found")  # Count the failed lookup
+            return result
 
-        console.print(table)  # Display the table
+        if region_info is None:
+            region_info = store.region(region.lower())  # Retrieve data for the selected region
+        result.rainfall = region_info["rainfall"]
+        result.climate = region_info["climate"]
+        result.avg_temp = region_info["avg_temp"]
+        seasons = ["Spring", "Summer", "Autumn", "Winter"]  # Define seasons
+        result.seasonal_rainfall = [
+            {"season": season, "rainfall": rain} for season, rain in zip(seasons, region_info["seasonal_variation"])
+        ]
 
-        console.print("[bold magenta]Region-Specific Recommendations:[/bold magenta]")  # Display recommendations header
         # Provide recommendations based on climate type
         if region_info['climate'] == "arid":
-            console.print("- Implement rainwater harvesting techniques.")
-            console.print("- Use drought-resistant crop varieties.")
+            result.recommendations = [
+                "Implement rainwater harvesting techniques.",
+                "Use drought-resistant crop varieties.",
+            ]
         elif region_info['climate'] in ["temperate", "humid"]:
-            console.print("- Optimize water distribution with smart sensors.")
-            console.print("- Enhance soil moisture retention via organic mulches.")
+            result.recommendations = [
+                "Optimize water distribution with smart sensors.",
+                "Enhance soil moisture retention via organic mulches.",
+            ]
         else:
-            console.print("- Integrate seasonal forecasting into irrigation planning.")
-            console.print("- Regularly assess and adjust soil moisture retention strategies.")
+            result.recommendations = [
+                "Integrate seasonal forecasting into irrigation planning.",
+                "Regularly assess and adjust soil moisture retention strategies.",
+            ]
     except Exception as e:
         # Handle any exceptions that occur during processing
-        console.print(f"[red]An error occurred: {str(e)}[/]")
-
-    rich_output = console.export_html()  # Export the Rich output to HTML
-    console.clear()  # Clear the console after exporting
-    return rich_output  # Return the HTML output
+        result.error = f"An error occurred: {str(e)}"
+        count_error("3", "exception")  # Count the failure
+    return result
 
 # Feature 4: Eco-Tips Section
+@cache_results(maxsize=1)  # The tips are constant, so the result is built once and reused
 def eco_tips_web():
-    # Create a new Console instance for this request
-    console = Console(record=True)
-    console.print(Panel("[bold blue]Eco-Tips Section[/bold blue]"))  # Display header panel
-
+    result = results.EcoTipsResult()
     try:
         # Define a list of eco-friendly tips categorized by their focus area
-        tips = [
+        result.tips = [
             {
                 "category": "Soil Health",
                 "tip": "Compost Organic Waste",
@@ -304,32 +870,287 @@ def eco_tips_web():
                 "description": "Reduce chemical usage by opting for environmentally friendly pesticide alternatives."
             },
         ]
+    except Exception as e:
+        # Handle any exceptions that occur during processing
+        result.error = f"An error occurred: {str(e)}"
+        count_error("4", "exception")  # Count the failure
+    return result
 
-        # Create a Rich table with categories, tips, and descriptions
-        table = Table(title="Eco-Tips", show_header=True, header_style="bold magenta")
-        table.add_column("Category", style="bold green")  # Category column
-        table.add_column("Tip", style="bold")  # Tip column
-        table.add_column("Description", style="italic")  # Description column
+# Job Queue Section
+# Slow features can run in the background: the POST enqueues the work and returns a job id at once,
+# and the page polls /jobs/<id> until the result is ready; API clients may instead listen on /jobs/<id>/events.
+# JOB_WORKERS bounds how many jobs run at once and JOB_QUEUE_DEPTH how many more may wait, so a burst
+# is turned away with 503 instead of tying up every request worker. JOB_WORKERS=0 turns async mode off.
+# An event stream holds a request thread until its job finishes, so at most JOB_EVENT_STREAMS are open
+# at once per process; beyond that the client gets a 503 and should poll instead.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))  # Jobs running at once
+JOB_QUEUE_DEPTH = int(os.environ.get("JOB_QUEUE_DEPTH", 16))  # Jobs allowed to wait for a worker
+JOB_RESULT_TTL = int(os.environ.get("JOB_RESULT_TTL", 600))  # Seconds a finished job's result is kept
+JOB_EVENT_STREAMS = int(os.environ.get("JOB_EVENT_STREAMS", 2))  # Event streams open at once
+job_event_slots = threading.BoundedSemaphore(max(JOB_EVENT_STREAMS, 1))  # Free event stream slots
 
-        for tip in tips:  # Populate the table with tips
-            table.add_row(tip["category"], tip["tip"], tip["description"])  # Add a row for each tip
+class JobQueueFull(Exception):
+    pass
 
-        console.print(table)  # Display the table
-    except Exception as e:
-        # Handle any exceptions that occur during processing
-        console.print(f"[red]An error occurred: {str(e)}[/]")
+class JobQueue:
+    def __init__(self, workers, depth, ttl):
+        self.workers = workers  # Jobs running at once
+        self.depth = depth  # Jobs allowed to wait
+        self.ttl = ttl  # Seconds finished jobs are kept
+        self._executor = None  # Created on first use, so forked web workers each start their own
+        self._slots = threading.BoundedSemaphore(max(workers + depth, 1))  # Running plus waiting jobs
+        self._jobs = {}  # Job id -> job record
+        self._changed = threading.Condition()  # Guards the records and wakes anyone waiting on a status change
+        self.submitted = 0  # Jobs accepted
+        self.rejected = 0  # Jobs turned away because the queue was full
+        self.failed = 0  # Jobs that raised an exception
+
+    @property
+    def enabled(self):
+        return self.workers > 0
 
-    # Export the Rich output to HTML
-    rich_output = console.export_html()
-    console.clear()  # Clear the console after exporting
-    return rich_output  # Return the HTML output
+    def _get_executor(self):
+        with self._changed:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            return self._executor
+
+    def _prune(self):
+        # Forget finished jobs older than the TTL (caller holds the lock)
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["finished"] and job["finished"] < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, feature, work):
+        # Queue work() and return the new job's id, or raise JobQueueFull when there is no room
+        if not self._slots.acquire(blocking=False):
+            with self._changed:
+                self.rejected += 1
+            raise JobQueueFull()
+        job_id = uuid.uuid4().hex
+        with self._changed:
+            self._prune()
+            self._jobs[job_id] = {
+                "id": job_id,
+                "feature": feature,
+                "status": "queued",  # queued -> running -> done | error
+                "created": time.time(),
+                "finished": None,
+                "result": None,
+                "error": None,
+            }
+            self.submitted += 1
+        self._get_executor().submit(self._run, job_id, work)
+        return job_id
+
+    def _update(self, job_id, **changes):
+        with self._changed:
+            self._jobs[job_id].update(changes)
+            self._changed.notify_all()  # Wake status waiters
+
+    def _run(self, job_id, work):
+        self._update(job_id, status="running")
+        try:
+            result = work()
+            self._update(job_id, status="done", result=result, finished=time.time())
+        except Exception as e:
+            # Handle any exceptions that occur during processing
+            with self._changed:
+                self.failed += 1
+            self._update(job_id, status="error", error=str(e), finished=time.time())
+        finally:
+            self._slots.release()
+
+    def get(self, job_id):
+        # Copy of a job's record, or None if unknown or expired
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id, last_status, timeout):
+        # Block until the job's status differs from last_status (or the timeout passes); returns a copy
+        with self._changed:
+            self._changed.wait_for(
+                lambda: self._jobs.get(job_id) is None or self._jobs[job_id]["status"] != last_status, timeout,
+            )
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def forget(self):
+        # Drop a job executor inherited from a parent process (its threads did not survive the fork)
+        with self._changed:
+            self._executor = None
+
+    def stats(self):
+        # Snapshot of the queue's configuration and counters
+        with self._changed:
+            statuses = [job["status"] for job in self._jobs.values()]
+            return {
+                "workers": self.workers,
+                "queue_depth": self.depth,
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "failed": self.failed,
+            }
+
+job_queue = JobQueue(JOB_WORKERS, JOB_QUEUE_DEPTH, JOB_RESULT_TTL)  # Shared background job queue
+
+def job_payload(job):
+    # Public view of a job record
+    payload = {"job_id": job["id"], "feature": job["feature"], "status": job["status"]}
+    if job["status"] == "done":
+        payload.update(job["result"])
+    elif job["status"] == "error":
+        payload["error"] = job["error"]
+    return payload
+
+def enqueue_job(feature, work):
+    # Queue work for the current request and answer with where to follow it
+    try:
+        job_id = job_queue.submit(feature, copy_current_request_context(work))  # Keeps url_for working in the worker
+    except JobQueueFull:
+        response = jsonify(error="Too many jobs are queued. Please try again shortly.")
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+    response = jsonify(
+        job_id=job_id, status="queued",
+        status_url=url_for('job_status', job_id=job_id),
+        events_url=url_for('job_events', job_id=job_id),
+    )
+    response.status_code = 202
+    response.headers["Location"] = url_for('job_status', job_id=job_id)
+    return response
+
+@app.context_processor
+def inject_async_jobs():
+    return {"async_jobs": job_queue.enabled}  # Lets the page offer the "run in background" option
+
+# Page Response Section
+# Every page index() serves on GET carries a strong ETag so browsers can revalidate instead of re-downloading.
+# The empty form served on GET never changes, so it is rendered once and repeat visits get a 304.
+_index_page = None  # (body, etag) of the empty form page
+
+def index_page():
+    # Render the empty form page once (or on every call while templates are being auto-reloaded)
+    global _index_page
+    if _index_page is None or app.jinja_env.auto_reload:
+        body = render_index()
+        _index_page = (body, hashlib.sha256(body.encode("utf-8")).hexdigest())
+    return _index_page
+
+def render_index(output=None, visualization_url=None, error=None, result_html=None):
+    # Render the main template (with a feature result's rendered partial, if any), timing it
+    with stage_timer("template_render"):
+        return render_template('index.html', output=output, visualization_url=visualization_url, error=error, result_html=result_html)
+
+# Output Format Section
+# Feature results are shown as a light HTML partial by default. Clients that prefer application/json
+# (or send format=json) get the result itself as compact JSON, and format=rich asks for the original
+# Rich console report; Rich is never loaded otherwise.
+output_formats = ["html", "json", "rich"]  # Accepted values of the format parameter
+
+def requested_format():
+    # Output format for the current request: the format parameter wins, then the Accept header
+    output_format = request.values.get('format', '').lower()
+    if output_format in output_formats:
+        return output_format
+    if request.accept_mimetypes.best_match(["text/html", "application/json"], default="text/html") == "application/json":
+        return "json"
+    return "html"
+
+def render_result(result, output_format):
+    # HTML for a feature result: its Jinja partial, or the Rich report when asked for. Results shared from
+    # a feature cache carry a _rendered dict, so each is rendered once per format (and per data version,
+    # since a new version means a new cached result) instead of on every request.
+    rendered = getattr(result, "_rendered", None)
+    if rendered is not None and output_format in rendered and not app.jinja_env.auto_reload:
+        return rendered[output_format]
+    if output_format == "rich":
+        with stage_timer("rich_export"):
+            html = result.rich_html()
+    else:
+        with stage_timer("template_render"):
+            html = render_template(result.template, result=result)
+    if rendered is not None:
+        rendered[output_format] = html  # Same output whichever thread gets here first
+    return html
+
+def feature_response(feature, result):
+    # Answer a feature request with its result in the requested format
+    output_format = requested_format()
+    if output_format == "json":
+        with stage_timer("json_encode"):
+            response = jsonify(feature=feature, result=result.to_dict())
+        response.vary.add("Accept")
+        return page_response(response)
+    visualization_url = getattr(result, "visualization_url", None)  # Only Feature 2 draws a chart
+    if output_format == "rich":
+        return page_response(render_index(output=render_result(result, output_format), visualization_url=visualization_url))
+    response = page_response(render_index(result_html=render_result(result, output_format), visualization_url=visualization_url))
+    response.vary.add("Accept")
+    return response
+
+def validation_error(message):
+    # Answer a request whose form data was missing or invalid: the page with an alert, or a JSON 400
+    count_error(g.get("feature", "other"), "validation")
+    if requested_format() == "json":
+        return jsonify(error=message), 400
+    return page_response(render_index(error=message))
+
+def job_result(result):
+    # What a finished background job reports: the JSON result, or ready-to-insert HTML for the page
+    output_format = requested_format()
+    if output_format == "json":
+        return {"result": result.to_dict()}
+    return {"output": render_result(result, output_format), "visualization_url": getattr(result, "visualization_url", None)}
+
+def page_response(body, etag=None):
+    # Wrap a rendered page (or JSON response) with a strong ETag and answer conditional requests with 304 Not Modified
+    response = make_response(body)
+    if request.method not in ("GET", "HEAD"):
+        return response  # Conditional requests only apply to GET, so hashing a POST's body is wasted work
+    if etag is None:
+        response.add_etag()  # Hash of the body
+    else:
+        response.set_etag(etag)
+    return response.make_conditional(request)
+
+location_error = f"Location needs a latitude (-90 to 90), a longitude (-180 to 180) and between 1 and {REGION_MAX_NEIGHBORS} nearest regions."
+
+def form_location(prefix=''):
+    # Optional farm location from the form as (lat, lon, neighbors), or None; raises ValueError when invalid
+    lat = request.form.get(f'{prefix}latitude')
+    lon = request.form.get(f'{prefix}longitude')
+    if not lat and not lon:
+        return None
+    if not lat or not lon:
+        raise ValueError("Latitude and longitude are both required")
+    lat, lon = float(lat), float(lon)
+    neighbors = int(request.form.get(f'{prefix}neighbors') or 1)  # Nearest regions to blend
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180 and 1 <= neighbors <= REGION_MAX_NEIGHBORS):
+        raise ValueError((lat, lon, neighbors))
+    return lat, lon, neighbors
 
 # Define the main route for the Flask application
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    output = None  # Initialize output variable
-    visualization_url = None  # Initialize visualization URL variable
-    error = None  # Initialize error message variable
+    if request.method == 'POST':
+        # Label this request's metrics with its feature
+        feature = request.form.get('feature')
+        g.feature = feature if feature in known_features else "other"
+        g.started = time.perf_counter()
+        app_metrics.inc("tsa_requests_total", "Feature requests received, by feature.", feature=g.feature)
+
+    if request.method == 'GET':  # Plain visit: serve the pre-rendered form page
+        body, etag = index_page()
+        response = page_response(body, etag)
+        response.headers["Cache-Control"] = "no-cache"  # Always revalidate, which is cheap thanks to the ETag
+        return response
+
+    result = None  # Initialize the feature result
 
     if request.method == 'POST':  # Check if the request is a POST
         feature = request.form.get('feature')  # Get the selected feature from the form
@@ -341,11 +1162,11 @@ def index():
             farm_size = request.form.get('farm_size')
             fertilizer_level = request.form.get('fertilizer_level')
             irrigation_eff = request.form.get('irrigation_eff')
+            optimize = request.form.get('optimize') == '1'  # Recommend settings instead of scoring this one
 
             # Validate that all required fields are filled
             if not all([crop_type, soil_quality, farm_size, fertilizer_level, irrigation_eff]):
-                error = "All fields are required for Crop Efficiency Planner."  # Set error message
-                return render_template('index.html', output=output, visualization_url=visualization_url, error=error)  # Render template with error
+                return validation_error("All fields are required for Crop Efficiency Planner.")  # Render template (or JSON) with error
 
             try:
                 # Convert input values to appropriate data types
@@ -354,49 +1175,440 @@ def index():
                 fertilizer_level = float(fertilizer_level)
                 irrigation_eff = float(irrigation_eff)
             except ValueError:
-                error = "Invalid input types. Please ensure numeric fields are correctly filled."  # Set error message
-                return render_template('index.html', output=output, visualization_url=visualization_url, error=error)  # Render template with error
+                return validation_error("Invalid input types. Please ensure numeric fields are correctly filled.")  # Render template (or JSON) with error
+            if not all(math.isfinite(value) for value in (farm_size, fertilizer_level, irrigation_eff)):
+                return validation_error("Numeric fields must be finite numbers.")  # "nan"/"inf" parse as floats but break the prediction and its JSON
 
-            # Call the Crop Efficiency Planner function and get the output
-            output = crop_efficiency_web(crop_type, soil_quality, farm_size, fertilizer_level, irrigation_eff)
+            if optimize:
+                if not 0 < irrigation_eff <= 1:
+                    return validation_error("Irrigation efficiency must be greater than 0 and at most 1 to optimize settings.")  # It divides the water applied
+                # Search fertilizer and irrigation settings, comparing against the ones entered
+                result = crop_optimizer_web(crop_type, farm_size, fertilizer_level, irrigation_eff)
+            else:
+                # Call the Crop Efficiency Planner function and get the result
+                result = crop_efficiency_web(crop_type, soil_quality, farm_size, fertilizer_level, irrigation_eff)
 
         elif feature == '2':  # Enhanced Water Management Tool
             # Retrieve form data
             irrigation_method = request.form.get('irrigation_method')
             soil_type = request.form.get('soil_type')
             region = request.form.get('region')
+            seed = request.form.get('seed') or DEFAULT_SIMULATION_SEED  # Optional simulation seed
+            trajectories = request.form.get('ensemble_size') or 1  # Optional Monte Carlo ensemble size
+
+            try:
+                location = form_location()  # Optional farm coordinates, used instead of the region
+            except ValueError:
+                return validation_error(location_error)  # Render template (or JSON) with error
 
             # Validate that all required fields are filled
-            if not all([irrigation_method, soil_type, region]):
-                error = "All fields are required for Water Management Tool."  # Set error message
-                return render_template('index.html', output=output, visualization_url=visualization_url, error=error)  # Render template with error
+            if not all([irrigation_method, soil_type, region or location]):
+                return validation_error("All fields are required for Water Management Tool.")  # Render template (or JSON) with error
+
+            try:
+                seed = int(seed)  # Convert the seed to an integer
+                if seed < 0:
+                    raise ValueError(seed)
+            except ValueError:
+                return validation_error("Simulation seed must be a non-negative whole number.")  # Render template (or JSON) with error
 
-            # Call the Water Management Tool function and get the output and visualization URL
-            output, visualization_url = water_management_web(irrigation_method, soil_type, region)
+            try:
+                trajectories = int(trajectories)  # Convert the ensemble size to an integer
+                if not 1 <= trajectories <= ENSEMBLE_MAX_TRAJECTORIES:
+                    raise ValueError(trajectories)
+            except ValueError:
+                return validation_error(f"Ensemble size must be a whole number between 1 and {ENSEMBLE_MAX_TRAJECTORIES}.")  # Render template (or JSON) with error
+
+            # Run in the background when the page asked for it and async mode is enabled
+            if request.form.get('async') == '1' and job_queue.enabled:
+                def work():
+                    return job_result(water_management_web(irrigation_method, soil_type, region, seed, trajectories, location))
+                return enqueue_job('2', work)
+
+            # Call the Water Management Tool function and get the result (including the visualization URL)
+            result = water_management_web(irrigation_method, soil_type, region, seed, trajectories, location)
 
         elif feature == '3':  # Enhanced Localized Water Data
             # Retrieve form data
             region = request.form.get('localized_region')
 
+            try:
+                location = form_location('localized_')  # Optional farm coordinates, used instead of the region
+            except ValueError:
+                return validation_error(location_error)  # Render template (or JSON) with error
+
             # Validate that the region is selected
-            if not region:
-                error = "Region selection is required for Localized Water Data."  # Set error message
-                return render_template('index.html', output=output, visualization_url=visualization_url, error=error)  # Render template with error
+            if not region and not location:
+                return validation_error("Region selection is required for Localized Water Data.")  # Render template (or JSON) with error
 
-            # Call the Localized Water Data function and get the output
-            output = localized_water_data_web(region)
+            # Call the Localized Water Data function and get the result
+            result = localized_water_data_web(region, location)
 
         elif feature == '4':  # Eco-Tips Section
-            # Call the Eco-Tips function and get the output
-            output = eco_tips_web()
+            # Call the Eco-Tips function and get the result
+            result = eco_tips_web()
 
         elif feature == '5':  # Exit
             # Redirect to the home page or display a goodbye message
             return redirect(url_for('index'))
 
-    # Render the main template with the output, visualization URL, and any error messages
-    return render_template('index.html', output=output, visualization_url=visualization_url, error=error)
+    if result is None:  # No (or an unknown) feature was selected
+        return validation_error("Please select a feature.")
+
+    # Render the result as an HTML partial, JSON or a Rich report
+    return feature_response(feature, result)
+
+# Batch Scenario Prediction API
+# Scores many what-if scenarios in one call: scenarios are grouped by crop and each group is
+# predicted with a single vectorised NumPy evaluation of the same model used by Feature 1.
+BATCH_MAX_SCENARIOS = int(os.environ.get("BATCH_MAX_SCENARIOS", 100000))  # Largest batch accepted in one request
+BATCH_STREAM_CHUNK = 1000  # Scenarios serialised per chunk when streaming
+batch_fields = ["soil_quality", "fertilizer_level", "irrigation_eff", "farm_size"]  # Numeric scenario fields
+
+def scenario_value(scenario, field):
+    # One numeric field of a scenario as a float, or NaN when it is missing or not a number
+    try:
+        return float(scenario[field])
+    except (KeyError, TypeError, ValueError):
+        return float("nan")
+
+def predict_batch(scenarios):
+    # Score a list of scenario dicts; returns one result dict per scenario, in input order
+    import numpy as np  # Numerical operations
+    scored = [None] * len(scenarios)
+    crops = [str(scenario.get("crop", "")).lower() if isinstance(scenario, dict) else "" for scenario in scenarios]
+    raw = [[scenario.get(field) for field in batch_fields] if isinstance(scenario, dict) else [None] * len(batch_fields) for scenario in scenarios]
+    try:
+        values = np.array(raw, dtype=float).reshape(len(scenarios), len(batch_fields))  # Missing fields become NaN
+    except (TypeError, ValueError):
+        # Some value is not a number: convert field by field so only those scenarios are rejected
+        values = np.array([[scenario_value(row, k) for k in range(len(batch_fields))] for row in raw]).reshape(len(scenarios), len(batch_fields))
+    valid = np.isfinite(values).all(axis=1) & np.array([bool(crop) for crop in crops], dtype=bool)  # One vectorised check
+    groups = {}  # Scenario indices grouped by crop
+
+    for i in np.flatnonzero(~valid).tolist():
+        scored[i] = {"error": "Scenario needs crop, " + ", ".join(batch_fields) + " as numbers."}
+    for i in np.flatnonzero(valid).tolist():
+        groups.setdefault(crops[i], []).append(i)
+
+    for crop, indices in groups.items():
+        if not model_registry.has_crop(crop):  # One lookup per crop, not per scenario
+            for i in indices:
+                scored[i] = {"crop": crop, "error": f"Crop type '{crop}' not found!"}
+            continue
+        model = model_registry.get(crop)
+        rows = values[indices]
+        with stage_timer("batch_prediction"):
+            predictions = predict_yield(model, rows[:, 1], rows[:, 2])  # Vectorised predict for the whole group
+        margin = 1.96 * model["rmse"]  # 95% confidence half-width
+        for i, prediction in zip(indices, predictions.tolist()):
+            scored[i] = {
+                "crop": crop,
+                "predicted_yield": prediction,
+                "conf_interval": [prediction - margin, prediction + margin],
+            }
+    return scored
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch_api():
+    payload = request.get_json(silent=True)  # Accept either a bare array or {"scenarios": [...]}
+    scenarios = payload.get("scenarios") if isinstance(payload, dict) else payload
+    if not isinstance(scenarios, list):
+        return jsonify(error="Expected a JSON array of scenarios."), 400
+    if len(scenarios) > BATCH_MAX_SCENARIOS:
+        return jsonify(error=f"Batch too large; at most {BATCH_MAX_SCENARIOS} scenarios per request."), 413
+
+    # Stream newline-delimited JSON when asked: each chunk is scored just before it is sent, so the
+    # first lines go out at once and only one chunk of results is held at a time
+    if request.args.get("stream") == "1" or request.accept_mimetypes.best == "application/x-ndjson":
+        def generate():
+            for start in range(0, len(scenarios), BATCH_STREAM_CHUNK):
+                chunk = predict_batch(scenarios[start:start + BATCH_STREAM_CHUNK])
+                yield "".join(json.dumps(result) + "\n" for result in chunk)
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    return jsonify(results=predict_batch(scenarios))
+
+# Settings Optimizer API
+# Recommends fertilizer and irrigation settings for a crop: POST {"crop", "farm_size"} and optionally
+# "fertilizer_level" / "irrigation_eff" (the current setting), "fertilizer_max" and "grid".
+@app.route('/api/optimize', methods=['POST'])
+def optimize_api():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error="Expected a JSON object with crop and farm_size."), 400
+    try:
+        crop = str(payload["crop"])
+        farm_size = float(payload["farm_size"])
+        fertilizer_level = float(payload.get("fertilizer_level", 0.0))
+        irrigation_eff = float(payload.get("irrigation_eff", OPTIMIZER_IRRIGATION_RANGE[0]))
+        fertilizer_max = payload.get("fertilizer_max")
+        fertilizer_max = None if fertilizer_max is None else float(fertilizer_max)
+        grid = int(payload.get("grid", OPTIMIZER_GRID))
+        if not all(math.isfinite(value) for value in (farm_size, fertilizer_level, irrigation_eff, fertilizer_max or 0.0)):
+            raise ValueError(payload)  # float() accepts "nan" and "inf", which would end up in the JSON body
+    except (KeyError, TypeError, ValueError):
+        return jsonify(error="Expected crop and a finite numeric farm_size (and finite numeric optional settings)."), 400
+    if farm_size <= 0 or not 2 <= grid <= OPTIMIZER_MAX_GRID or (fertilizer_max is not None and fertilizer_max <= 0):
+        return jsonify(error=f"farm_size and fertilizer_max must be positive and grid between 2 and {OPTIMIZER_MAX_GRID}."), 400
+    if not 0 < irrigation_eff <= 1:
+        return jsonify(error="irrigation_eff must be greater than 0 and at most 1."), 400  # It divides the water applied
+
+    result = crop_optimizer_web(crop, farm_size, fertilizer_level, irrigation_eff, fertilizer_max, grid)
+    if result.error:
+        return jsonify(error=result.error, available_crops=result.available_crops), 404 if result.available_crops else 500
+    return jsonify(result.to_dict())
+
+# Observation Ingestion API
+# New yield/water/fertilizer observations are folded into each crop's model as they arrive. Send a JSON
+# array (or {"observations": [...]}) for a bulk load, or application/x-ndjson with one observation per
+# line to stream; streams are processed in chunks so memory stays flat however long the upload is.
+INGEST_CHUNK = 10000  # Observations grouped per model update when streaming
+INGEST_MAX_ERRORS = 100  # Rejected observations reported back in detail
+observation_fields = ["yield", "water_use", "fertilizer"]  # Numeric observation fields
+
+def ingest_observations(observations, report, offset=0):
+    # Validate a chunk of observation dicts, group them by crop and update each crop's model once
+    import numpy as np  # Numerical operations
+    groups = {}  # Crop -> rows of [yield, water_use, fertilizer]
+    for number, observation in enumerate(observations, start=offset + 1):
+        try:
+            crop = str(observation["crop"]).strip().lower()
+            row = [float(observation[field]) for field in observation_fields]
+            if not crop or not np.isfinite(row).all():
+                raise ValueError(observation)
+        except (KeyError, TypeError, ValueError):
+            report["rejected"] += 1
+            if len(report["errors"]) < INGEST_MAX_ERRORS:
+                report["errors"].append({"observation": number, "error": "Observation needs crop, " + ", ".join(observation_fields) + " as numbers."})
+            continue
+        groups.setdefault(crop, []).append(row)
+
+    for crop, rows in groups.items():
+        rows = np.asarray(rows)
+        model_registry.observe(crop, rows[:, 0], rows[:, 1], rows[:, 2])
+        report["accepted"] += len(rows)
+        report["crops"][crop] = report["crops"].get(crop, 0) + len(rows)
+
+def iter_stream_lines(stream, block_size=1 << 16):
+    # Yield lines from a request body read in large blocks (line-by-line reads on the WSGI stream are slow)
+    pending = b""
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        lines = (pending + block).split(b"\n")
+        pending = lines.pop()  # Incomplete last line waits for the next block
+        yield from lines
+    if pending:
+        yield pending
+
+@app.route('/api/observations', methods=['POST'])
+def observations_api():
+    report = {"accepted": 0, "rejected": 0, "crops": {}, "errors": []}
+
+    if request.mimetype == "application/x-ndjson":
+        # Stream: parse line by line straight off the request body
+        chunk, count = [], 0
+        for line in iter_stream_lines(request.stream):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                chunk.append(json.loads(line))
+            except ValueError:
+                chunk.append(None)  # Counted as rejected, keeping observation numbers aligned
+            if len(chunk) >= INGEST_CHUNK:
+                ingest_observations(chunk, report, count)
+                count += len(chunk)
+                chunk = []
+        ingest_observations(chunk, report, count)
+        return jsonify(report)
+
+    payload = request.get_json(silent=True)  # Accept either a bare array or {"observations": [...]}
+    observations = payload.get("observations") if isinstance(payload, dict) else payload
+    if not isinstance(observations, list):
+        return jsonify(error="Expected a JSON array of observations or an application/x-ndjson stream."), 400
+    ingest_observations(observations, report)
+    return jsonify(report)
+
+# Record each feature request's total duration once its response is ready
+@app.after_request
+def observe_request_duration(response):
+    if "started" in g:
+        app_metrics.histogram(
+            "tsa_request_duration_seconds", "Feature request latency, by feature.", feature=g.feature,
+        ).observe(time.perf_counter() - g.started)
+    return response
+
+# Expose metrics in the Prometheus text format
+@app.route('/metrics')
+def metrics_endpoint():
+    lines = [app_metrics.render().rstrip("\n")]
+    # Cache and queue statistics, read at scrape time
+    model = model_registry.stats()
+    chart = chart_cache.stats()
+    jobs = job_queue.stats()
+    lines += metrics.gauge_lines("tsa_model_cache_hits_total", "Model registry lookups served from cache.", model["hits"], "counter")
+    lines += metrics.gauge_lines("tsa_model_cache_misses_total", "Model registry lookups that needed a fit.", model["misses"], "counter")
+    lines += metrics.gauge_lines("tsa_observations_ingested_total", "Observations folded into crop models.", model["observations"], "counter")
+    lines += metrics.gauge_lines("tsa_chart_cache_hits_total", "Charts served from the chart cache.", chart["hits"], "counter")
+    lines += metrics.gauge_lines("tsa_chart_cache_misses_total", "Charts that had to be rendered.", chart["misses"], "counter")
+    lines += metrics.gauge_lines("tsa_chart_cache_evictions_total", "Charts evicted from the chart cache.", chart["evictions"], "counter")
+    lines += metrics.gauge_lines("tsa_chart_cache_bytes", "Bytes of charts held on disk.", chart["bytes"])
+    lines += metrics.gauge_lines("tsa_chart_cache_entries", "Charts held on disk.", chart["entries"])
+    lines += metrics.gauge_lines("tsa_jobs_queued", "Background jobs waiting for a worker.", jobs["queued"])
+    lines += metrics.gauge_lines("tsa_jobs_running", "Background jobs running.", jobs["running"])
+    lines += metrics.gauge_lines("tsa_jobs_rejected_total", "Background jobs turned away because the queue was full.", jobs["rejected"], "counter")
+    lines += metrics.gauge_lines("tsa_jobs_failed_total", "Background jobs that raised an exception.", jobs["failed"], "counter")
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+# Report a background job's status (and its result once done)
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify(error="Job not found or expired."), 404
+    return jsonify(job_payload(job))
+
+# Stream a background job's status changes as server-sent events
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify(error="Job not found or expired."), 404
+    if JOB_EVENT_STREAMS <= 0 or not job_event_slots.acquire(blocking=False):
+        response = jsonify(error="Too many event streams are open; poll the status URL instead.", status_url=url_for('job_status', job_id=job_id))
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+
+    def stream():
+        last_status = None
+        while True:
+            job = job_queue.wait(job_id, last_status, timeout=15)
+            if job is None:
+                return  # Expired while we were waiting
+            if job["status"] == last_status:
+                yield ": keep-alive\n\n"  # Comment line keeps proxies from closing the connection
+                continue
+            last_status = job["status"]
+            yield f"event: status\ndata: {json.dumps(job_payload(job))}\n\n"
+            if last_status in ("done", "error"):
+                return
+
+    response = Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(job_event_slots.release)  # Free the slot however the stream ends
+    return response
+
+# Report background job queue counters
+@app.route('/api/jobs/stats')
+def job_stats():
+    return jsonify(job_queue.stats())  # Configuration, queue depth and counters as JSON
+
+# Report model registry cache counters
+@app.route('/api/models/stats')
+def model_stats():
+    return jsonify(model_registry.stats())  # Hits, misses and cached crops as JSON
+
+# Report chart cache counters
+@app.route('/api/charts/stats')
+def chart_stats():
+    return jsonify(chart_cache.stats())  # Hits, misses, evictions and disk usage as JSON
+
+# Warm-up Section
+# Heavy libraries load when a feature first needs them. WARMUP_FEATURES (e.g. "1,2" or "all") pays that
+# cost at boot instead, so the first request to the listed features is as fast as later ones.
+WARMUP_FEATURES = os.environ.get("WARMUP_FEATURES", "")  # Features to warm up when the app loads
+
+def warm_up(features):
+    # Load the libraries and shared state behind the given features
+    if features.strip().lower() == "all":
+        features = {"1", "2", "3", "4"}
+    else:
+        features = {feature.strip() for feature in features.split(",") if feature.strip()}
+    if features & {"1", "2", "3"}:
+        get_data_store()  # Opens (or seeds) the memory-mapped data store
+    if "1" in features:
+        model_registry.warm()  # Loads NumPy and fits every crop's model
+    if "2" in features:
+        import numpy  # Used by the water simulation
+        chart_renderer.warm()  # Loads the plotting stack (and starts render workers, if configured)
+    if features & {"1", "2", "3", "4"}:
+        for result_type in (results.CropEfficiencyResult, results.OptimizationResult, results.WaterManagementResult, results.LocalizedWaterResult, results.EcoTipsResult):
+            app.jinja_env.get_template(result_type.template)  # Compile the result partials
+        app.jinja_env.get_template('index.html')
+
+if not RENDER_WORKER:
+    warm_up(WARMUP_FEATURES)  # A render worker warming up would try to start a pool of its own during bootstrap
+
+# Serve Section
+# "python app.py serve" runs the app under Gunicorn (an optional dependency) with gunicorn.conf.py.
+# The master process loads the data store, fits every crop model, compiles the templates and loads the
+# plotting backend before forking its workers, so they share that memory copy-on-write. A SIGHUP
+# reloads the data in the master and replaces the workers gracefully.
+SERVE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gunicorn.conf.py")  # Default server settings
+
+def preload_shared_state(workers=1):
+    # Load everything the workers should inherit (runs in the master, before forking)
+    if workers > 1:
+        job_queue.workers = 0  # Job records live in one worker's memory, so polls to another would 404
+    warm_up("1,3,4")  # Data store, fitted models and compiled templates
+    import numpy  # Used by the water simulation
+    charts.load_plotting()  # Plotting stack for inline renders; render pools are started per worker
+
+def reload_shared_state():
+    # Reopen the data store from disk and drop everything derived from the old data
+    global _data_store, regional_data_version, _index_page
+    with _data_store_lock:
+        _data_store = None  # Next use opens whatever store is now in DATA_STORE_DIR
+    model_registry.invalidate()  # Refit every crop from the new data
+    regional_data_version += 1  # Rebuild localized results and the region index
+    _index_page = None
+
+def after_fork():
+    # Forget worker pools inherited from the master; each worker starts its own on first use
+    chart_renderer.forget()
+    job_queue.forget()
+
+def serve(argv):
+    # Run the production server: Gunicorn with gunicorn.conf.py, overridden by any command-line options
+    import argparse  # Command-line options
+    import sys  # Exit with a message when Gunicorn is missing
+    parser = argparse.ArgumentParser(prog="python app.py serve", description="Serve the app with Gunicorn.")
+    parser.add_argument("--bind", help="Address to listen on, e.g. 0.0.0.0:3000 (SERVE_BIND)")
+    parser.add_argument("--workers", type=int, help="Worker processes (SERVE_WORKERS, default: one per CPU)")
+    parser.add_argument("--threads", type=int, help="Request threads per worker (SERVE_THREADS)")
+    parser.add_argument("--keepalive", type=int, help="Seconds to keep idle connections open (SERVE_KEEPALIVE)")
+    parser.add_argument("--config", default=SERVE_CONFIG, help="Gunicorn configuration file")
+    args = parser.parse_args(argv)
+
+    try:
+        from gunicorn.app.base import Application  # Optional dependency
+    except ImportError:
+        sys.exit("The serve command needs Gunicorn: pip install gunicorn")
+
+    overrides = {name: getattr(args, name) for name in ("bind", "workers", "threads", "keepalive") if getattr(args, name) is not None}
+
+    class ServeApplication(Application):
+        def init(self, parser, opts, args):
+            pass  # Settings come from load_config below
+
+        def load_config(self):
+            # Read the config file, then apply command-line options (also re-run on every reload)
+            self.load_config_from_file(args.config)
+            for name, value in overrides.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            return app
+
+    sys.modules.setdefault("app", sys.modules[__name__])  # Let gunicorn.conf.py's hooks reach this module
+    ServeApplication().run()
 
 # Run the Flask application in debug mode
 if __name__ == "__main__":
-    app.run(debug=True)  # Start the Flask development server with debug mode enabled
+    import sys  # Command-line arguments
+    if sys.argv[1:2] == ["serve"]:
+        serve(sys.argv[2:])  # Production server
+    else:
+        app.run(debug=True, threaded=True)  # Start the Flask development server with debug mode enabled; rendering is thread-safe
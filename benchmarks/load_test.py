@@ -0,0 +1,214 @@
+# Load-test benchmark suite
+# Drives index() through Flask's test client (no network, no server) for features 1-4 at a given
+# concurrency in the chosen output format (the HTML page by default, or JSON), counts a feature that answers
+# with an error as a failure, and reports throughput and p50/p95/p99 latency per feature, followed by micro-benchmarks
+# of the hot steps: model fit, predict, chart build/draw, savefig and Rich export_html.
+# Results can be saved as a JSON baseline and later compared against one to flag regressions.
+#
+#   python benchmarks/load_test.py                                  # all features, 200 requests, 4 threads
+#   python benchmarks/load_test.py --features 1,2 --requests 500 --concurrency 8
+#   python benchmarks/load_test.py --format json                    # JSON results instead of the page
+#   python benchmarks/load_test.py --save baseline.json
+#   python benchmarks/load_test.py --compare baseline.json --threshold 0.15   # exits 1 on regression
+import argparse  # Command-line options
+import contextlib  # Keep stray console output out of the report
+import io  # In-memory PNG target for savefig
+import json  # Baselines
+import math  # Percentile ranks
+import os  # Paths
+import platform  # Recorded with results
+import statistics  # Means
+import sys  # Import path and exit code
+import tempfile  # Scratch chart directory, so runs never touch the real chart cache
+import threading  # Per-thread test clients
+import time  # Timing
+from concurrent.futures import ThreadPoolExecutor  # Concurrent request threads
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Repository root (where app.py lives)
+sys.path.insert(0, ROOT)
+
+from startup import FEATURE_FORMS  # Same form data as the startup benchmark
+
+def percentile(values, q):
+    # Nearest-rank percentile of a list of numbers
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(latencies, wall_time):
+    # Throughput and latency percentiles (milliseconds) for one run
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / wall_time if wall_time else 0.0,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+def result_error(response, output_format):
+    # The error a feature answered with, or None
+    if output_format == "json":
+        return (response.get_json() or {}).get("result", {}).get("error")
+    if 'class="alert alert-danger"' in response.get_data(as_text=True):  # Result partials and page errors both use it
+        return "error alert on the page"
+    return None
+
+def load_feature(app_module, feature, requests, concurrency, warmup, fresh_charts, output_format):
+    # Post one feature's form `requests` times from `concurrency` threads, each with its own client
+    local = threading.local()
+
+    def one_request(number):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app_module.app.test_client()
+        form = dict(FEATURE_FORMS[feature], format=output_format)
+        if feature == "2" and fresh_charts:
+            form["seed"] = str(number)  # A new seed per request, so every chart is really rendered
+        started = time.perf_counter()
+        response = client.post("/", data=form)
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError(f"Feature {feature} returned HTTP {response.status_code}")
+        error = result_error(response, output_format)
+        if error is not None:
+            raise RuntimeError(f"Feature {feature} returned an error: {error}")
+        return elapsed
+
+    offset = int(time.time()) * 1000  # Seeds not rendered by earlier runs
+    for number in range(offset, offset + warmup):
+        one_request(number)  # Warm-up requests are not measured
+    offset += warmup
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(one_request, range(offset, offset + requests)))
+    return summarize(latencies, time.perf_counter() - started)
+
+def time_calls(function, repeat):
+    # Mean and p95 (milliseconds) of repeated calls
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return {"mean_ms": statistics.mean(timings) * 1000, "p95_ms": percentile(timings, 95) * 1000}
+
+def micro_benchmarks(app_module, repeat):
+    # Time the individual hot-path steps in isolation
+    import numpy as np
+    import charts
+    from rich.console import Console
+    from rich.table import Table
+
+    registry = app_module.model_registry
+    model = registry.get("wheat")
+    fertilizer = np.linspace(0, 20, 1000)
+    months = list(range(1, 13))
+    rainfall, losses = app_module.simulate_water_year([200, 300, 250, 250], 0.95, 0.9)
+
+    def build_and_draw():
+        fig = charts.build_water_chart(months, rainfall[0].tolist(), losses[0].tolist(), "north")
+        fig.canvas.draw()
+
+    figure = charts.build_water_chart(months, rainfall[0].tolist(), losses[0].tolist(), "north")
+
+    def rich_console():
+        console = Console(record=True, file=io.StringIO(), width=80)
+        table = Table(title="Eco-Tips", show_header=True, header_style="bold magenta")
+        for column in ("Category", "Tip", "Description"):
+            table.add_column(column)
+        for row in range(10):
+            table.add_row("Soil Health", f"Tip {row}", "Enhance soil organic matter by composting kitchen and garden waste.")
+        console.print(table)
+        return console
+
+    return {
+        "model_fit": time_calls(lambda: registry.refit("wheat"), repeat),
+        "predict_single": time_calls(lambda: app_module.predict_yield(model, 5.0, 0.9), repeat),
+        "predict_vector_1000": time_calls(lambda: app_module.predict_yield(model, fertilizer, 0.9), repeat),
+        "simulate_ensemble_10000": time_calls(lambda: app_module.simulate_water_year([200, 300, 250, 250], 0.95, 0.9, 10000), repeat),
+        "chart_build_and_draw": time_calls(build_and_draw, max(1, repeat // 5)),
+        "savefig_png_150dpi": time_calls(lambda: figure.savefig(io.BytesIO(), dpi=150, format="png"), max(1, repeat // 5)),
+        "rich_export_html": time_calls(lambda: rich_console().export_html(), repeat),
+    }
+
+def flatten(results):
+    # {"features": {"1": {"p50_ms": ...}}, ...} -> {"features.1.p50_ms": ...}
+    flat = {}
+    for section in ("features", "micro"):
+        for name, metrics in results.get(section, {}).items():
+            for metric, value in metrics.items():
+                if metric != "requests":
+                    flat[f"{section}.{name}.{metric}"] = value
+    return flat
+
+def compare(current, baseline, threshold):
+    # List metrics that got worse than the baseline by more than `threshold` (a fraction)
+    regressions = []
+    now, before = flatten(current), flatten(baseline)
+    for key in sorted(set(now) & set(before)):
+        old, new = before[key], now[key]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = change < -threshold if key.endswith("throughput_rps") else change > threshold
+        print(f"{key:<45} {old:>11.3f} -> {new:>11.3f}  {change * 100:+7.1f}%{'  REGRESSION' if worse else ''}")
+        if worse:
+            regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test index() features and micro-benchmark the hot paths.")
+    parser.add_argument("--features", default="1,2,3,4", help="Comma-separated features to load-test")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per feature")
+    parser.add_argument("--concurrency", type=int, default=4, help="Request threads")
+    parser.add_argument("--format", choices=("html", "json"), default="html", help="Output format to request (html is the page users get)")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per feature before timing")
+    parser.add_argument("--repeat", type=int, default=50, help="Calls per micro-benchmark")
+    parser.add_argument("--cached-charts", action="store_true", help="Reuse one seed for Feature 2 so charts come from the cache")
+    parser.add_argument("--skip-micro", action="store_true", help="Only run the load test")
+    parser.add_argument("--save", help="Write results to this JSON baseline file")
+    parser.add_argument("--compare", help="Compare against this JSON baseline file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging a regression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)  # app.py uses paths relative to the repository root
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), tempfile.TemporaryDirectory() as charts_dir:
+        import app  # Anything the app or its libraries print (e.g. warnings on stdout) stays out of the report
+        # Render into a scratch directory so runs don't fill (or evict from) the real static/visuals cache
+        app.chart_cache = app.ChartCache(charts_dir, app.CHART_CACHE_MAX_ENTRIES, app.CHART_CACHE_MAX_BYTES)
+        results = {
+            "config": {
+                "requests": args.requests, "concurrency": args.concurrency, "warmup": args.warmup, "format": args.format,
+                "cached_charts": args.cached_charts, "python": platform.python_version(), "machine": platform.machine(),
+            },
+            "features": {},
+        }
+        for feature in [f.strip() for f in args.features.split(",") if f.strip()]:
+            results["features"][feature] = load_feature(
+                app, feature, args.requests, args.concurrency, args.warmup, not args.cached_charts, args.format,
+            )
+        if not args.skip_micro:
+            results["micro"] = micro_benchmarks(app, args.repeat)
+
+    print(f"{'feature':>7} {'req/s':>9} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}   (ms)")
+    for feature, metrics in results["features"].items():
+        print(f"{feature:>7} {metrics['throughput_rps']:>9.1f} {metrics['mean_ms']:>9.2f} {metrics['p50_ms']:>9.2f} "
+              f"{metrics['p95_ms']:>9.2f} {metrics['p99_ms']:>9.2f}")
+    for name, metrics in results.get("micro", {}).items():
+        print(f"{name:<26} mean {metrics['mean_ms']:>9.3f} ms   p95 {metrics['p95_ms']:>9.3f} ms")
+
+    if args.save:
+        with open(args.save, "w") as handle:
+            json.dump(results, handle, indent=2)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
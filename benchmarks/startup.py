@@ -0,0 +1,91 @@
+# Startup benchmark
+# Measures, in a fresh Python process per run, how long `import app` takes and how long the first
+# (cold) and second (warm) request to each feature take through Flask's test client.
+#
+#   python benchmarks/startup.py                      # all features, 3 runs each
+#   python benchmarks/startup.py --features 3,4 --repeat 5
+#   python benchmarks/startup.py --warmup all --json startup.json
+import argparse  # Command-line options
+import json  # Exchange results with the child processes
+import os  # Paths and environment
+import random  # Fresh simulation seeds so Feature 2 always renders
+import statistics  # Medians across runs
+import subprocess  # Fresh interpreter per run
+import sys  # Interpreter path
+import time  # Wall-clock timing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Repository root (where app.py lives)
+
+# Form data posted for each feature
+FEATURE_FORMS = {
+    "1": {"feature": "1", "crop_type": "wheat", "soil_quality": "50", "farm_size": "10",
+          "fertilizer_level": "5", "irrigation_eff": "0.9"},
+    "2": {"feature": "2", "irrigation_method": "drip", "soil_type": "loam", "region": "north"},
+    "3": {"feature": "3", "localized_region": "north"},
+    "4": {"feature": "4"},
+}
+
+# Code run in the child process; the last line it prints is the JSON result
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+form = json.loads(sys.argv[1])
+before = time.perf_counter()
+first = client.post('/', data=form)
+after_first = time.perf_counter()
+client.post('/', data=form)
+after_second = time.perf_counter()
+print()
+print(json.dumps({
+    "status": first.status_code,
+    "import_s": imported - start,
+    "first_response_s": after_first - before,
+    "warm_response_s": after_second - after_first,
+    "modules": len(sys.modules),
+}))
+"""
+
+def run_once(feature, warmup):
+    # Time one fresh process: interpreter start, import, first and second request
+    form = dict(FEATURE_FORMS[feature])
+    if feature == "2":
+        form["seed"] = str(random.randrange(2 ** 31))  # Unseen seed, so the chart really renders
+    env = dict(os.environ, WARMUP_FEATURES=warmup)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps(form)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["time_to_first_response_s"] = time.perf_counter() - started  # Includes interpreter start-up
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-response per feature.")
+    parser.add_argument("--features", default="1,2,3,4", help="Comma-separated features to measure")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per feature (median is reported)")
+    parser.add_argument("--warmup", default="", help="WARMUP_FEATURES value for the child processes")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    report = {"warmup": args.warmup, "repeat": args.repeat, "features": {}}
+    print(f"{'feature':>7} {'import':>9} {'first req':>10} {'warm req':>9} {'to 1st resp':>12} {'modules':>8}")
+    for feature in [f.strip() for f in args.features.split(",") if f.strip()]:
+        runs = [run_once(feature, args.warmup) for _ in range(args.repeat)]
+        summary = {key: statistics.median(run[key] for run in runs)
+                   for key in ("import_s", "first_response_s", "warm_response_s", "time_to_first_response_s", "modules")}
+        summary["status"] = runs[-1]["status"]
+        report["features"][feature] = summary
+        print(f"{feature:>7} {summary['import_s'] * 1000:>7.1f}ms {summary['first_response_s'] * 1000:>8.1f}ms "
+              f"{summary['warm_response_s'] * 1000:>7.1f}ms {summary['time_to_first_response_s'] * 1000:>10.1f}ms "
+              f"{int(summary['modules']):>8}")
+
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# Chart rendering for the Water Management Tool
+# This lives in its own module so chart worker processes only import the plotting stack, not the web app
+import multiprocessing  # Process start method for render workers
+import threading  # Locks for lazy loading and pool creation
+import time  # Stage timings returned to the web process
+from concurrent.futures import ProcessPoolExecutor  # Pool of render worker processes
+
+_plotting = None  # (Figure, FigureCanvasAgg) once the plotting stack has been loaded
+_plotting_lock = threading.Lock()  # Make sure the stack is loaded and themed only once per process
+
+def load_plotting():
+    # Import matplotlib and Seaborn and apply the theme, once per process (web process or render worker).
+    # The theme only writes matplotlib's rcParams, which figures read when they are created.
+    global _plotting
+    with _plotting_lock:
+        if _plotting is None:
+            import matplotlib  # Plotting library
+            matplotlib.use('Agg')  # Use non-interactive backend for web compatibility
+            from matplotlib.figure import Figure  # Figure objects that don't touch pyplot's global state
+            from matplotlib.backends.backend_agg import FigureCanvasAgg  # Raster canvas for saving PNGs
+            import seaborn as sns  # Statistical data visualization
+            sns.set_theme(style="whitegrid")
+            _plotting = (Figure, FigureCanvasAgg)
+        return _plotting
+
+def build_water_chart(months, monthly_rainfall, water_losses, region):
+    # Draw on a private Figure/Axes pair so concurrent renders can't interfere with each other
+    Figure, FigureCanvasAgg = load_plotting()
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)  # Attach the Agg canvas used by savefig
+    ax = fig.add_subplot()
+    ax.plot(months, monthly_rainfall, marker='o', label='Monthly Rainfall (mm)', color="#3498db")  # Plot rainfall
+    ax.plot(months, water_losses, marker='s', label='Simulated Water Loss (mm)', color="#e74c3c")  # Plot water loss
+    ax.set_title(f"Seasonal Water Usage Simulation - {region.capitalize()} Region", fontsize=16)  # Set plot title
+    ax.set_xlabel("Month", fontsize=14)  # X-axis label
+    ax.set_ylabel("Water (mm)", fontsize=14)  # Y-axis label
+    ax.legend()  # Show legend
+    ax.set_xticks(months)  # Set x-ticks to months
+    fig.tight_layout()  # Adjust layout
+    return fig
+
+def save_chart(build, path, *args):
+    # Build a chart and save it as a PNG; returns how long plotting and savefig took, in seconds
+    started = time.perf_counter()
+    fig = build(*args)
+    plotted = time.perf_counter()
+    fig.savefig(path, dpi=150, format="png")  # Save the plot as a PNG file
+    return {"plotting": plotted - started, "savefig": time.perf_counter() - plotted}
+
+def render_water_chart(path, months, monthly_rainfall, water_losses, region):
+    return save_chart(build_water_chart, path, months, monthly_rainfall, water_losses, region)
+
+def build_water_ensemble_chart(months, rainfall_bands, loss_bands, region, trajectories):
+    # Draw the ensemble as p10-p90 shaded bands around the median, with the mean dashed
+    Figure, FigureCanvasAgg = load_plotting()
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)  # Attach the Agg canvas used by savefig
+    ax = fig.add_subplot()
+    for bands, label, color, marker in (
+        (rainfall_bands, 'Rainfall (mm)', "#3498db", 'o'),
+        (loss_bands, 'Simulated Water Loss (mm)', "#e74c3c", 's'),
+    ):
+        ax.fill_between(months, bands["p10"], bands["p90"], color=color, alpha=0.2, label=f'{label} p10-p90')  # Shade the 80% band
+        ax.plot(months, bands["p50"], marker=marker, color=color, label=f'{label} median')  # Plot the median
+        ax.plot(months, bands["mean"], linestyle='--', color=color, label=f'{label} mean')  # Plot the mean
+    ax.set_title(f"Seasonal Water Usage Ensemble ({trajectories} years) - {region.capitalize()} Region", fontsize=16)  # Set plot title
+    ax.set_xlabel("Month", fontsize=14)  # X-axis label
+    ax.set_ylabel("Water (mm)", fontsize=14)  # Y-axis label
+    ax.legend(fontsize='small')  # Show legend (six entries, so keep it compact)
+    ax.set_xticks(months)  # Set x-ticks to months
+    fig.tight_layout()  # Adjust layout
+    return fig
+
+def render_water_ensemble_chart(path, months, rainfall_bands, loss_bands, region, trajectories):
+    return save_chart(build_water_ensemble_chart, path, months, rainfall_bands, loss_bands, region, trajectories)
+
+class ChartRenderer:
+    # Renders charts in the calling thread, or in a pool of worker processes when workers > 0
+    def __init__(self, workers=0):
+        self.workers = workers  # Number of render processes (0 renders in the request thread)
+        self._pool = None  # Created on first use, so forked web workers each start their own
+        self._lock = threading.Lock()  # Guard lazy pool creation
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Spawned workers start a fresh interpreter, so they never inherit the web server's threads; they
+                # re-import the launching script (as __mp_main__) before unpickling a render from this module
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def submit(self, render, *args):
+        # Schedule a render function in the pool and return its future
+        return self._get_pool().submit(render, *args)
+
+    def render(self, render, *args):
+        # Run a render function and wait for it; only this request thread blocks while a worker draws
+        if self.workers <= 0:
+            return render(*args)
+        return self.submit(render, *args).result()
+
+    def warm(self):
+        # Start the worker processes and load the plotting stack in each, or in this process when inline
+        if self.workers <= 0:
+            load_plotting()
+            return
+        pool = self._get_pool()
+        for future in [pool.submit(load_plotting) for _ in range(self.workers)]:
+            future.result()
+
+    def forget(self):
+        # Drop a pool inherited from a parent process without stopping it; the next render starts a new one
+        with self._lock:
+            self._pool = None
+
+    def shutdown(self):
+        # Stop the worker processes, if any were started
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
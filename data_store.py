@@ -0,0 +1,294 @@
+# Columnar Data Store
+# Crop history and regional climate data live on disk as one .npy file per column and are opened
+# memory-mapped, so every worker process shares the same page-cache copy and only the rows a request
+# touches are ever read. A small JSON manifest holds the indexes: each crop's rows are stored
+# contiguously and indexed by (start, stop) offsets, and each region is indexed by its row number,
+# so lookups are O(1) dictionary hits followed by a slice.
+#
+# Each build is written to its own store-<version> subdirectory and published by atomically replacing the
+# CURRENT file that names it, so a store can be rebuilt in place while the app is running: processes that
+# already opened the old version keep reading it, and the next open (or a reload) sees the new one.
+# Anything else in the directory, such as the observation log, is left alone.
+#
+# Build (or rebuild) a store from CSV files with:
+#   python data_store.py build --crops crops.csv --regions regions.csv --out data
+# crops.csv columns:   crop, yield, water_use, fertilizer            (one row per farm-year)
+# regions.csv columns: region, rainfall, climate, avg_temp, spring, summer, autumn, winter
+#                      and optionally lat, lon (region centre in degrees, for location lookups)
+import argparse  # Command-line options for building a store
+import csv  # Read source CSV files
+import hashlib  # Content hash used as the store version
+import json  # Manifest with indexes and metadata
+import os  # Paths and atomic renames
+import shutil  # Remove half-written stores
+import tempfile  # Build stores in a private directory first
+import numpy as np  # Columns are NumPy arrays
+try:
+    import fcntl  # File locks for the shared observation log (POSIX only)
+except ImportError:
+    fcntl = None
+
+STORE_FORMAT = 2  # Bump when the on-disk layout changes
+READABLE_FORMATS = (1, 2)  # Format 1 stores have no region coordinates
+MANIFEST = "manifest.json"  # Manifest filename inside the store directory
+CURRENT = "CURRENT"  # File naming the published store subdirectory
+CROP_COLUMNS = ["yield", "water_use", "fertilizer"]  # Per farm-year columns
+SEASONS = 4  # Seasonal rainfall values stored per region
+
+def write_store(path, crop_rows, regions, replace=False):
+    # Write a store from crop_rows ({crop: {column: values}}) and regions ({region: info}).
+    # The store is built in a temporary directory and renamed into place, so readers never see
+    # a half-written store. With replace it becomes the current store even if one is published
+    # already; otherwise, if another process got there first, its store is kept.
+    os.makedirs(path, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix=".store-", dir=path)
+    digest = hashlib.sha256()  # Content hash of every column, used as the store version
+
+    def save(name, array):
+        np.save(os.path.join(temp_dir, f"{name}.npy"), array)
+        digest.update(name.encode("utf-8"))
+        digest.update(np.ascontiguousarray(array).tobytes())
+
+    try:
+        # Crop columns: rows grouped by crop, indexed by (start, stop) offsets
+        crop_index = {}
+        start = 0
+        for crop in sorted(crop_rows):
+            count = len(crop_rows[crop][CROP_COLUMNS[0]])
+            crop_index[crop] = [start, start + count]
+            start += count
+        for column in CROP_COLUMNS:
+            values = [np.asarray(crop_rows[crop][column], dtype=float) for crop in sorted(crop_rows)]
+            save(f"crop_{column}", np.concatenate(values) if values else np.empty(0))
+
+        # Region columns: one row per region, indexed by row number
+        region_names = sorted(regions)
+        climates = sorted({regions[name]["climate"] for name in region_names})
+        save("region_rainfall", np.array([regions[name]["rainfall"] for name in region_names], dtype=float))
+        save("region_avg_temp", np.array([regions[name]["avg_temp"] for name in region_names], dtype=float))
+        save("region_climate", np.array([climates.index(regions[name]["climate"]) for name in region_names], dtype=np.int32))
+        save("region_seasonal", np.array([regions[name]["seasonal_variation"] for name in region_names], dtype=float).reshape(-1, SEASONS))
+        for column in ("lat", "lon"):  # Region centres; NaN where a region has no coordinates
+            save(f"region_{column}", np.array([
+                np.nan if regions[name].get(column) is None else regions[name][column] for name in region_names
+            ], dtype=float))
+
+        manifest = {
+            "format": STORE_FORMAT,
+            "version": digest.hexdigest()[:16],
+            "crops": crop_index,
+            "regions": {name: row for row, name in enumerate(region_names)},
+            "climates": climates,
+        }
+        with open(os.path.join(temp_dir, MANIFEST), "w") as handle:
+            json.dump(manifest, handle)
+
+        name = f"store-{manifest['version']}"
+        try:
+            os.rename(temp_dir, os.path.join(path, name))
+        except OSError:
+            if not os.path.exists(os.path.join(path, name, MANIFEST)):
+                raise
+            shutil.rmtree(temp_dir, ignore_errors=True)  # The same data is already on disk
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    _publish(path, name, replace)
+
+def _publish(path, name, replace):
+    # Point CURRENT at a store subdirectory; the pointer is replaced atomically, never rewritten in place
+    pointer = os.path.join(path, f".{CURRENT}.{os.getpid()}.tmp")
+    with open(pointer, "w") as handle:
+        handle.write(name)
+    if replace:
+        previous = current_store(path)
+        os.replace(pointer, os.path.join(path, CURRENT))
+        _prune(path, keep={name, previous})
+        return
+    try:
+        os.link(pointer, os.path.join(path, CURRENT))  # Fails if another process published first
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(pointer)
+
+def _prune(path, keep):
+    # Delete store subdirectories other than those in keep (processes that still map them keep their pages)
+    for entry in os.listdir(path):
+        if entry.startswith("store-") and entry not in keep:
+            shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+
+def current_store(path):
+    # Name of the published store subdirectory, or None for an unbuilt (or single-version) directory
+    try:
+        with open(os.path.join(path, CURRENT)) as handle:
+            return handle.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def read_csv_sources(crops_csv, regions_csv):
+    # Read crop and region CSV files into the structures write_store expects
+    crop_rows = {}
+    with open(crops_csv, newline="") as handle:
+        for row in csv.DictReader(handle):
+            columns = crop_rows.setdefault(row["crop"].strip().lower(), {column: [] for column in CROP_COLUMNS})
+            for column in CROP_COLUMNS:
+                columns[column].append(float(row[column]))
+
+    regions = {}
+    with open(regions_csv, newline="") as handle:
+        for row in csv.DictReader(handle):
+            regions[row["region"].strip().lower()] = {
+                "rainfall": float(row["rainfall"]),
+                "climate": row["climate"].strip().lower(),
+                "avg_temp": float(row["avg_temp"]),
+                "seasonal_variation": [float(row[season]) for season in ("spring", "summer", "autumn", "winter")],
+                "lat": float(row["lat"]) if row.get("lat") else None,
+                "lon": float(row["lon"]) if row.get("lon") else None,
+            }
+    return crop_rows, regions
+
+def _coordinate(value):
+    # Stored coordinate -> float, or None when the region has none
+    value = float(value)
+    return None if np.isnan(value) else value
+
+class DataStore:
+    # Read-only view of the current store in a store directory
+    def __init__(self, path):
+        self.path = path  # Store directory
+        current = current_store(path)
+        files = os.path.join(path, current) if current else path  # Stores written before CURRENT existed are flat
+        with open(os.path.join(files, MANIFEST)) as handle:
+            manifest = json.load(handle)
+        if manifest.get("format") not in READABLE_FORMATS:
+            raise ValueError(f"Unsupported data store format in {files}: {manifest.get('format')}")
+        self.version = manifest["version"]  # Content hash of the columns on disk
+        self._crop_index = {crop: tuple(offsets) for crop, offsets in manifest["crops"].items()}  # Crop -> (start, stop)
+        self._region_index = manifest["regions"]  # Region -> row
+        self._climates = manifest["climates"]  # Climate names by code
+        self._columns = {
+            name: np.load(os.path.join(files, f"{name}.npy"), mmap_mode="r")  # Memory-mapped, shared between processes
+            for name in [f"crop_{column}" for column in CROP_COLUMNS]
+            + ["region_rainfall", "region_avg_temp", "region_climate", "region_seasonal"]
+        }
+        for name in ("region_lat", "region_lon"):
+            path_npy = os.path.join(files, f"{name}.npy")
+            self._columns[name] = (
+                np.load(path_npy, mmap_mode="r") if os.path.exists(path_npy)
+                else np.full(len(self._region_index), np.nan)  # Format 1 stores have no coordinates
+            )
+
+    @classmethod
+    def open_or_seed(cls, path, crop_rows, regions):
+        # Open the store at path, writing it from the given seed data first if it doesn't exist yet
+        if current_store(path) is None and not os.path.exists(os.path.join(path, MANIFEST)):
+            write_store(path, crop_rows, regions)
+        return cls(path)
+
+    def crops(self):
+        # Names of every crop with history
+        return sorted(self._crop_index)
+
+    def has_crop(self, crop):
+        return crop in self._crop_index
+
+    def crop_history(self, crop):
+        # Column arrays for one crop; slices of the memory map, so nothing is copied
+        start, stop = self._crop_index[crop]  # Raises KeyError for unknown crops
+        return {column: self._columns[f"crop_{column}"][start:stop] for column in CROP_COLUMNS}
+
+    def regions(self):
+        # Names of every region
+        return sorted(self._region_index)
+
+    def has_region(self, region):
+        return region in self._region_index
+
+    def region(self, region):
+        # Climate record for one region, in the same shape as the original regional_data entries
+        row = self._region_index[region]  # Raises KeyError for unknown regions
+        return {
+            "rainfall": float(self._columns["region_rainfall"][row]),
+            "climate": self._climates[int(self._columns["region_climate"][row])],
+            "avg_temp": float(self._columns["region_avg_temp"][row]),
+            "seasonal_variation": self._columns["region_seasonal"][row].tolist(),
+            "lat": _coordinate(self._columns["region_lat"][row]),
+            "lon": _coordinate(self._columns["region_lon"][row]),
+        }
+
+    def region_coordinates(self):
+        # (names, lat, lon) for every region, with NaN where a region has no coordinates
+        names = self.regions()
+        rows = [self._region_index[name] for name in names]
+        return names, np.asarray(self._columns["region_lat"])[rows], np.asarray(self._columns["region_lon"])[rows]
+
+class ObservationLog:
+    # Append-only log of observations ingested while running: one file per crop of float64 rows in
+    # CROP_COLUMNS order, next to the store. Writers append whole rows under a file lock, so several
+    # processes can share one log; readers only ever read whole rows, from any row onwards.
+    ROW_BYTES = len(CROP_COLUMNS) * 8  # Bytes per row
+
+    def __init__(self, path):
+        self.path = path  # Directory holding the per-crop files
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, crop):
+        return os.path.join(self.path, crop.encode("utf-8").hex() + ".obs")  # Hex keeps any crop name filename-safe
+
+    def crops(self):
+        # Names of every crop with logged observations
+        return sorted(bytes.fromhex(name[:-4]).decode("utf-8") for name in os.listdir(self.path) if name.endswith(".obs"))
+
+    def has_crop(self, crop):
+        return os.path.exists(self._file(crop))
+
+    def rows(self, crop):
+        # Number of complete rows logged for a crop
+        return self.stat(crop)[1]
+
+    def stat(self, crop):
+        # (file identity, complete rows) for a crop; the identity changes when its log is cleared and restarted
+        try:
+            info = os.stat(self._file(crop))
+        except FileNotFoundError:
+            return None, 0
+        return (info.st_dev, info.st_ino), info.st_size // self.ROW_BYTES
+
+    def append(self, crop, rows):
+        # Append an (n, len(CROP_COLUMNS)) array of rows for a crop
+        data = np.ascontiguousarray(rows, dtype=np.float64).tobytes()
+        with open(self._file(crop), "ab") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)  # One writer at a time, so rows never interleave
+            try:
+                handle.write(data)
+                handle.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def read(self, crop, start=0, stop=None):
+        # Rows [start, stop) for a crop as an (n, len(CROP_COLUMNS)) array
+        stop = self.rows(crop) if stop is None else stop
+        if stop <= start:
+            return np.empty((0, len(CROP_COLUMNS)))
+        rows = np.fromfile(self._file(crop), dtype=np.float64, count=(stop - start) * len(CROP_COLUMNS), offset=start * self.ROW_BYTES)
+        return rows.reshape(-1, len(CROP_COLUMNS))
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a columnar data store from CSV files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Write a store from crop and region CSV files")
+    build.add_argument("--crops", required=True, help="CSV with crop, yield, water_use, fertilizer columns")
+    build.add_argument("--regions", required=True, help="CSV with region, rainfall, climate, avg_temp, season and optional lat/lon columns")
+    build.add_argument("--out", default="data", help="Store directory to create or update; a store already there is replaced")
+    args = parser.parse_args()
+
+    crop_rows, regions = read_csv_sources(args.crops, args.regions)
+    write_store(args.out, crop_rows, regions, replace=True)
+    store = DataStore(args.out)
+    print(f"Wrote {len(store.crops())} crops and {len(store.regions())} regions to {args.out} (version {store.version})")
+
+if __name__ == "__main__":
+    main()
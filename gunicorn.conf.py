@@ -0,0 +1,34 @@
+# Gunicorn settings for "python app.py serve" (or "gunicorn -c gunicorn.conf.py app:app")
+# Every value can be set through the environment; command-line options to "serve" take precedence.
+# The app is preloaded in the master process and the workers are forked from it, so the data store,
+# fitted models and plotting backend are loaded once and shared copy-on-write. Send the master a
+# SIGHUP (kill -HUP <pid>) to re-read the data and replace the workers without dropping requests.
+import multiprocessing  # CPU count for the default worker count
+import os  # Environment overrides
+
+bind = os.environ.get("SERVE_BIND", "0.0.0.0:3000")  # Address to listen on
+workers = int(os.environ.get("SERVE_WORKERS", multiprocessing.cpu_count()))  # Worker processes
+worker_class = "gthread"  # Threaded workers: rendering and the model registry are thread-safe
+threads = int(os.environ.get("SERVE_THREADS", 4))  # Concurrent requests per worker
+keepalive = int(os.environ.get("SERVE_KEEPALIVE", 5))  # Seconds an idle keep-alive connection stays open
+timeout = int(os.environ.get("SERVE_TIMEOUT", 60))  # Seconds before a stuck worker is restarted
+graceful_timeout = int(os.environ.get("SERVE_GRACEFUL_TIMEOUT", 30))  # Seconds workers get to finish on reload or shutdown
+max_requests = int(os.environ.get("SERVE_MAX_REQUESTS", 0))  # Recycle workers after this many requests (0 = never)
+max_requests_jitter = max_requests // 10  # Stagger recycling so workers don't restart together
+preload_app = True  # Load the app once in the master, before forking
+
+def on_starting(server):
+    # The app module is already loaded (preload_app); fill in its shared state before the first fork
+    import app
+    app.preload_shared_state(server.cfg.workers)
+
+def on_reload(server):
+    # SIGHUP: reload the data in the master so the replacement workers fork with it
+    import app
+    app.reload_shared_state()
+    app.preload_shared_state(server.cfg.workers)
+
+def post_fork(server, worker):
+    # Each worker starts its own chart render and job pools
+    import app
+    app.after_fork()
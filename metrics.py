@@ -0,0 +1,108 @@
+# Metrics
+# Minimal in-process counters and histograms rendered in the Prometheus text exposition format.
+# Observing a value is a bisect into a short bucket list plus a locked increment, so the timers
+# are cheap enough to leave on around every hot-path stage.
+import bisect  # Find an observation's bucket
+import threading  # Locks for concurrent updates
+import time  # High-resolution timer
+
+# Latency buckets in seconds, from 100 µs up to 10 s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)  # Upper bounds (inclusive), ascending
+        self.counts = [0] * (len(self.buckets) + 1)  # One slot per bucket plus +Inf
+        self.sum = 0.0  # Total of all observations
+        self.count = 0  # Number of observations
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        # Cumulative bucket counts, sum and count, read consistently
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, total, count
+
+class Timer:
+    # Context manager that observes the elapsed time of its block into a histogram
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+def _format_labels(labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}" if labels else ""
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms = {}  # name -> {labels: Histogram}
+        self._counters = {}  # name -> {labels: value}
+        self._help = {}  # name -> (type, help text)
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text, **labels):
+        # Return (creating on first use) the histogram for a name and label set
+        key = tuple(sorted(labels.items()))
+        series = self._histograms.get(name)
+        histogram = series.get(key) if series else None
+        if histogram is None:
+            with self._lock:
+                self._help.setdefault(name, ("histogram", help_text))
+                histogram = self._histograms.setdefault(name, {}).setdefault(key, Histogram())
+        return histogram
+
+    def timer(self, name, help_text, **labels):
+        return Timer(self.histogram(name, help_text, **labels))
+
+    def inc(self, name, help_text, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, ("counter", help_text))
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def render(self):
+        # Every metric in the Prometheus text exposition format (version 0.0.4)
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            help_texts = dict(self._help)
+        for name in sorted(counters):
+            lines.append(f"# HELP {name} {help_texts[name][1]}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for name in sorted(histograms):
+            lines.append(f"# HELP {name} {help_texts[name][1]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(histograms[name].items()):
+                cumulative, total, count = histogram.snapshot()
+                for bound, bucket_count in zip(list(histogram.buckets) + ["+Inf"], cumulative):
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {bucket_count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+def gauge_lines(name, help_text, value, kind="gauge", **labels):
+    # Exposition lines for a single value read at scrape time (e.g. cache statistics)
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name}{_format_labels(tuple(sorted(labels.items())))} {value}"]
@@ -0,0 +1,190 @@
+# Feature Results
+# Each feature returns one of these plain result objects instead of pre-rendered HTML. The web layer
+# renders it with a light Jinja partial (template), returns it as compact JSON (to_dict), or, only when
+# explicitly asked for, draws the original Rich console report (rich_html). Rich is imported lazily,
+# so requests that never ask for it never load it.
+from dataclasses import dataclass, field, asdict  # Result containers
+from typing import ClassVar, Optional  # Annotations for the result fields
+
+def _rich_console():
+    # Recording console whose output is exported as HTML
+    from rich.console import Console  # Rich library for enhanced console output
+    return Console(record=True)
+
+def _rich_location(console, location):
+    # The farm location and the regions it resolved to
+    if location:
+        regions = ", ".join(f"{n['region'].capitalize()} ({n['distance_km']:.0f} km, weight {n['weight']:.2f})" for n in location["neighbors"])
+        console.print(f"[bold cyan]Location:[/bold cyan] {location['lat']:.4f}, {location['lon']:.4f} -> {regions}")
+
+def _rich_export(console, title, draw):
+    # Print the header panel, call draw(console) and export everything as HTML
+    from rich.panel import Panel  # Rich library for panel formatting
+    console.print(Panel(f"[bold blue]{title}[/bold blue]"))  # Display header panel
+    draw(console)
+    rich_output = console.export_html()  # Export the Rich output to HTML
+    console.clear()  # Clear the console after exporting
+    return rich_output
+
+class FeatureResult:
+    template: ClassVar[str] = ""  # Jinja partial that renders this result
+    title: ClassVar[str] = ""  # Heading of the Rich report
+
+    def to_dict(self):
+        # JSON-ready copy of every field
+        return asdict(self)
+
+    def rich_html(self):
+        # The Rich console report for this result, as HTML
+        return _rich_export(_rich_console(), self.title, self._draw_rich)
+
+    def _draw_rich(self, console):
+        if self.error:
+            console.print(f"[red]{self.error}[/]")  # Display error
+            return
+        self._draw_rich_result(console)
+
+@dataclass
+class CropEfficiencyResult(FeatureResult):
+    template: ClassVar[str] = "partials/crop_efficiency.html"
+    title: ClassVar[str] = "Advanced Crop Efficiency Planner"
+
+    crop: str = ""  # Crop the prediction is for
+    farm_size: float = 0.0  # Acres planted
+    predicted_yield: Optional[float] = None  # Predicted yield (units)
+    conf_interval: Optional[list] = None  # 95% confidence interval [low, high]
+    recommendations: list = field(default_factory=list)  # Suggested next steps
+    available_crops: Optional[list] = None  # Set when the crop was not found
+    error: Optional[str] = None  # Why no prediction was made
+
+    def _draw_rich_result(self, console):
+        console.print(f"[bold cyan]Optimized Planting Layout:[/bold cyan] {self.farm_size:.2f} acres of {self.crop.capitalize()}")
+        console.print(f"[bold cyan]Predicted Yield:[/bold cyan] {self.predicted_yield:.2f} units")
+        console.print(f"[bold cyan]95% Confidence Interval:[/bold cyan] ({self.conf_interval[0]:.2f}, {self.conf_interval[1]:.2f})")
+        console.print("[bold magenta]Recommendations:[/bold magenta]")
+        for recommendation in self.recommendations:
+            console.print(f"- {recommendation}")
+
+@dataclass
+class OptimizationResult(FeatureResult):
+    template: ClassVar[str] = "partials/optimization.html"
+    title: ClassVar[str] = "Fertilizer and Irrigation Optimizer"
+
+    crop: str = ""  # Crop the settings are for
+    farm_size: float = 0.0  # Acres planted; totals are scaled by it
+    candidates: int = 0  # Settings scored
+    front: list = field(default_factory=list)  # Pareto-optimal settings, by fertilizer then water use
+    best: Optional[dict] = None  # Highest-yielding setting considered
+    current: Optional[dict] = None  # The setting that was entered, for comparison
+    available_crops: Optional[list] = None  # Set when the crop was not found
+    error: Optional[str] = None  # Why no settings were recommended
+
+    def _draw_rich_result(self, console):
+        from rich.table import Table  # Rich library for table formatting
+        console.print(f"[bold cyan]Crop:[/bold cyan] {self.crop.capitalize()} on {self.farm_size:.2f} acres")
+        console.print(f"[bold cyan]Settings Scored:[/bold cyan] {self.candidates}")
+        console.print(f"[bold cyan]Current Setting:[/bold cyan] {self.current['predicted_yield']:.2f} units/acre "
+                      f"(fertilizer {self.current['fertilizer_level']:.2f} kg/acre, irrigation {self.current['irrigation_eff']:.3f})")
+        console.print(f"[bold cyan]Best Setting:[/bold cyan] {self.best['predicted_yield']:.2f} units/acre "
+                      f"(fertilizer {self.best['fertilizer_level']:.2f} kg/acre, irrigation {self.best['irrigation_eff']:.3f})")
+        table = Table(title="Pareto Front", show_header=True, header_style="bold magenta")
+        for column in ("Fertilizer (kg/acre)", "Irrigation Eff.", "Yield", "Total Yield", "Total Fertilizer (kg)", "Total Water (mm x acres)"):
+            table.add_column(column, justify="right")
+        for point in self.front:
+            table.add_row(
+                f"{point['fertilizer_level']:.2f}", f"{point['irrigation_eff']:.3f}", f"{point['predicted_yield']:.2f}",
+                f"{point['total_yield']:.2f}", f"{point['total_fertilizer']:.2f}", f"{point['total_water']:.2f}",
+            )
+        console.print(table)
+
+@dataclass
+class WaterManagementResult(FeatureResult):
+    template: ClassVar[str] = "partials/water_management.html"
+    title: ClassVar[str] = "Enhanced Water Management Tool"
+
+    region: str = ""  # Region simulated
+    irrigation_method: str = ""  # As entered
+    soil_type: str = ""  # As entered
+    seed: int = 0  # Simulation seed
+    trajectories: int = 1  # Simulated years
+    months: list = field(default_factory=list)  # Month numbers, 1-12
+    rainfall: list = field(default_factory=list)  # Monthly rainfall (mm); the ensemble mean when trajectories > 1
+    losses: list = field(default_factory=list)  # Monthly simulated water loss (mm); the ensemble mean when trajectories > 1
+    average_rainfall: Optional[float] = None  # Mean monthly rainfall (mm)
+    average_loss: Optional[float] = None  # Mean monthly water loss (mm)
+    rainfall_range: Optional[list] = None  # p10/p90 of each simulated year's average rainfall (ensembles only)
+    loss_range: Optional[list] = None  # p10/p90 of each simulated year's average loss (ensembles only)
+    rainfall_bands: Optional[dict] = None  # Monthly mean and p10/p50/p90 rainfall (ensembles only)
+    loss_bands: Optional[dict] = None  # Monthly mean and p10/p50/p90 loss (ensembles only)
+    visualization_url: Optional[str] = None  # Chart of the simulation
+    suggestions: list = field(default_factory=list)  # Suggested next steps
+    location: Optional[dict] = None  # Farm coordinates and the regions they resolved to, when given
+    error: Optional[str] = None  # Why the simulation did not run
+
+    def _draw_rich_result(self, console):
+        _rich_location(console, self.location)
+        if self.trajectories == 1:
+            console.print(f"[bold cyan]Average Monthly Rainfall:[/bold cyan] {self.average_rainfall:.2f} mm")
+            console.print(f"[bold cyan]Average Simulated Water Loss:[/bold cyan] {self.average_loss:.2f} mm")
+        else:
+            console.print(f"[bold cyan]Ensemble Size:[/bold cyan] {self.trajectories} simulated years")
+            console.print(f"[bold cyan]Average Monthly Rainfall:[/bold cyan] {self.average_rainfall:.2f} mm (p10-p90: {self.rainfall_range[0]:.2f}-{self.rainfall_range[1]:.2f} mm)")
+            console.print(f"[bold cyan]Average Simulated Water Loss:[/bold cyan] {self.average_loss:.2f} mm (p10-p90: {self.loss_range[0]:.2f}-{self.loss_range[1]:.2f} mm)")
+        if self.visualization_url:
+            console.print(f"[bold cyan]Visualization saved to:[/bold cyan] {self.visualization_url}")  # Inform user about saved visualization
+        console.print("[bold magenta]Advanced Suggestions:[/bold magenta]")
+        for suggestion in self.suggestions:
+            console.print(f"- {suggestion}")
+
+@dataclass
+class LocalizedWaterResult(FeatureResult):
+    template: ClassVar[str] = "partials/localized_water_data.html"
+    title: ClassVar[str] = "Enhanced Localized Water Data"
+
+    region: str = ""  # Region name
+    rainfall: Optional[float] = None  # Annual rainfall (mm)
+    climate: Optional[str] = None  # Climate type
+    avg_temp: Optional[float] = None  # Average temperature (°C)
+    seasonal_rainfall: list = field(default_factory=list)  # [{"season": ..., "rainfall": ...}] for each season
+    recommendations: list = field(default_factory=list)  # Climate-specific suggestions
+    location: Optional[dict] = None  # Farm coordinates and the regions they resolved to, when given
+    error: Optional[str] = None  # Why no data was returned
+
+    def _draw_rich_result(self, console):
+        from rich.table import Table  # Rich library for table formatting
+        _rich_location(console, self.location)
+        console.print(f"[bold cyan]Region:[/bold cyan] {self.region.capitalize()}")  # Display region name
+        console.print(f"[bold cyan]Annual Rainfall:[/bold cyan] {self.rainfall:g} mm")  # Display annual rainfall
+        console.print(f"[bold cyan]Climate:[/bold cyan] {self.climate.capitalize()}")  # Display climate type
+        console.print(f"[bold cyan]Average Temperature:[/bold cyan] {self.avg_temp:g} °C")  # Display average temperature
+
+        console.print("[bold cyan]Seasonal Rainfall Distribution (mm):[/bold cyan]")  # Display section header
+        table = Table(show_header=True, header_style="bold magenta")  # Initialize Rich table
+        table.add_column("Season")  # Add Season column
+        table.add_column("Rainfall (mm)", justify="right")  # Add Rainfall column
+        for row in self.seasonal_rainfall:  # Populate table with seasonal data
+            table.add_row(row["season"], f"{row['rainfall']:g}")  # Add a row for each season
+        console.print(table)  # Display the table
+
+        console.print("[bold magenta]Region-Specific Recommendations:[/bold magenta]")  # Display recommendations header
+        for recommendation in self.recommendations:
+            console.print(f"- {recommendation}")
+
+@dataclass
+class EcoTipsResult(FeatureResult):
+    template: ClassVar[str] = "partials/eco_tips.html"
+    title: ClassVar[str] = "Eco-Tips Section"
+
+    tips: list = field(default_factory=list)  # [{"category": ..., "tip": ..., "description": ...}]
+    error: Optional[str] = None  # Why no tips were returned
+
+    def _draw_rich_result(self, console):
+        from rich.table import Table  # Rich library for table formatting
+        # Create a Rich table with categories, tips, and descriptions
+        table = Table(title="Eco-Tips", show_header=True, header_style="bold magenta")
+        table.add_column("Category", style="bold green")  # Category column
+        table.add_column("Tip", style="bold")  # Tip column
+        table.add_column("Description", style="italic")  # Description column
+        for tip in self.tips:  # Populate the table with tips
+            table.add_row(tip["category"], tip["tip"], tip["description"])  # Add a row for each tip
+        console.print(table)  # Display the table
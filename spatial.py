@@ -0,0 +1,61 @@
+# Spatial Region Index
+# Resolves a farm's latitude/longitude to the nearest climate regions. Region centres are stored as 3-D
+# unit vectors, so straight-line (chord) distance orders points exactly like great-circle distance and a
+# KD-tree answers k-nearest queries in O(log n) however large the region table is. SciPy's cKDTree is used
+# when SciPy is installed; otherwise the same query runs as one vectorised NumPy pass over every region.
+import numpy as np  # Coordinates and distances
+
+EARTH_RADIUS_KM = 6371.0  # Mean Earth radius
+IDW_POWER = 2  # Inverse-distance weighting exponent used when blending regions
+
+def unit_vectors(lat, lon):
+    # Latitude/longitude in degrees -> (n, 3) points on the unit sphere
+    lat, lon = np.radians(np.asarray(lat, dtype=float)), np.radians(np.asarray(lon, dtype=float))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+def chord_to_km(chord):
+    # Straight-line distance between unit vectors -> great-circle distance in km
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0.0, 1.0))
+
+class RegionLocator:
+    # Nearest-region lookups over a fixed set of region centres (build a new locator when regions change)
+    def __init__(self, names, lat, lon):
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        located = np.isfinite(lat) & np.isfinite(lon)  # Regions without coordinates can't be found by location
+        self.names = [name for name, keep in zip(names, located) if keep]  # Region name per indexed point
+        self._points = unit_vectors(lat[located], lon[located])
+        self._tree = None
+        if len(self.names):
+            try:
+                from scipy.spatial import cKDTree  # Optional: KD-tree for large region tables
+                self._tree = cKDTree(self._points)
+            except ImportError:
+                pass  # Fall back to a vectorised scan
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest(self, lat, lon, k=1):
+        # The k nearest regions to a point, closest first, as [(name, distance_km), ...]
+        k = min(k, len(self.names))
+        if k <= 0:
+            return []
+        point = unit_vectors(lat, lon)
+        if self._tree is not None:
+            chords, rows = self._tree.query(point, k=k)
+            chords, rows = np.atleast_1d(chords), np.atleast_1d(rows)
+        else:
+            distances = np.linalg.norm(self._points - point, axis=1)
+            rows = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+            rows = rows[np.argsort(distances[rows], kind="stable")]
+            chords = distances[rows]
+        return [(self.names[row], float(km)) for row, km in zip(rows.tolist(), chord_to_km(chords).tolist())]
+
+def idw_weights(distances_km, power=IDW_POWER):
+    # Inverse-distance weights summing to 1; a region at (almost) zero distance takes all the weight
+    distances = np.asarray(distances_km, dtype=float)
+    exact = distances < 1e-6
+    if exact.any():
+        return (exact / exact.sum()).tolist()
+    weights = 1.0 / distances ** power
+    return (weights / weights.sum()).tolist()
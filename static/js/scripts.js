@@ -63,6 +63,15 @@ function toggleFeatures() {
     }
 }
 
+/**
+ * Whether both farm coordinates were entered for a feature form (fields named <prefix>latitude / <prefix>longitude).
+ */
+function hasFarmLocation(prefix) {
+    var latitude = document.getElementById(prefix + "latitude");
+    var longitude = document.getElementById(prefix + "longitude");
+    return !!(latitude && longitude && latitude.value !== "" && longitude.value !== "");
+}
+
 /**
  * Event listener for DOMContentLoaded to ensure the script runs after the DOM is fully loaded.
  */
@@ -135,19 +144,21 @@ document.addEventListener("DOMContentLoaded", function() {
                     valid = false;
                     errorMessage += "Soil type is required.\n";
                 }
+                var hasLocation = hasFarmLocation(""); // Coordinates can replace the region
+
                 // Validate Region
-                if (!region) {
+                if (!region && !hasLocation) {
                     valid = false;
-                    errorMessage += "Region is required.\n";
+                    errorMessage += "Region (or a farm latitude and longitude) is required.\n";
                 }
             } else if (selectedFeature === "3") { // If Enhanced Localized Water Data is selected
                 // Retrieve input value for Localized Water Data
                 var localizedRegion = document.getElementById("localized_region").value;
 
-                // Validate Localized Region selection
-                if (!localizedRegion) {
+                // Validate Localized Region selection (coordinates can replace it)
+                if (!localizedRegion && !hasFarmLocation("localized_")) {
                     valid = false;
-                    errorMessage += "Please select a region.\n";
+                    errorMessage += "Please select a region or enter a farm latitude and longitude.\n";
                 }
             }
             // Feature 4 (Eco-Tips) requires no additional inputs
@@ -170,5 +181,80 @@ document.addEventListener("DOMContentLoaded", function() {
         if (loadingSpinner) {
             loadingSpinner.style.display = "block"; // Show the loading spinner
         }
+
+        // Background mode: submit without leaving the page and wait for the job to finish
+        var asyncCheckbox = document.getElementById("async");
+        if (selectedFeature === "2" && asyncCheckbox && asyncCheckbox.checked && window.fetch) {
+            e.preventDefault(); // Stay on the page
+            submitAsync(form, executeButton, loadingSpinner);
+        }
     });
 });
+
+/**
+ * Submit the form as a background job, then follow the job until its result is ready.
+ */
+function submitAsync(form, executeButton, loadingSpinner) {
+    var asyncOutput = document.getElementById("async-output"); // Where the finished result is shown
+    asyncOutput.innerHTML = ""; // Clear any earlier result
+
+    // Restore the Execute button and hide the spinner
+    function finish() {
+        executeButton.disabled = false;
+        executeButton.innerText = "Execute";
+        if (loadingSpinner) {
+            loadingSpinner.style.display = "none";
+        }
+    }
+
+    // Show a finished job's output, visualization or error
+    function showJob(job) {
+        if (job.status === "done") {
+            var html = "<h3>Output:</h3><div class=\"feature-output\">" + job.output + "</div>";
+            if (job.visualization_url) {
+                html += "<h3>Visualization:</h3><img src=\"" + job.visualization_url + "\" alt=\"Visualization\" class=\"visualization\">";
+            }
+            asyncOutput.innerHTML = html;
+        } else {
+            asyncOutput.innerHTML = "<div class=\"alert alert-danger\" role=\"alert\"></div>";
+            asyncOutput.firstChild.textContent = job.error || "The job failed.";
+        }
+        finish();
+    }
+
+    // Poll the status endpoint once a second until the job finishes
+    function poll(statusUrl) {
+        fetch(statusUrl).then(function(response) { return response.json(); }).then(function(job) {
+            if (job.status === "done" || job.status === "error" || !job.status) {
+                showJob(job);
+            } else {
+                setTimeout(function() { poll(statusUrl); }, 1000);
+            }
+        }).catch(function() {
+            setTimeout(function() { poll(statusUrl); }, 1000);
+        });
+    }
+
+    fetch(form.action || window.location.href, { method: "POST", body: new FormData(form) })
+        .then(function(response) {
+            if (response.status === 202) {
+                return response.json().then(function(job) {
+                    // Poll rather than hold a server-sent event stream: a stream ties up a request thread for the whole job
+                    poll(job.status_url);
+                });
+            }
+            if (response.headers.get("Content-Type").indexOf("application/json") === 0) {
+                // Queue full or other JSON error
+                return response.json().then(function(body) { showJob({ status: "error", error: body.error }); });
+            }
+            // Validation errors come back as a full page; show it as a normal submission would
+            return response.text().then(function(html) {
+                document.open();
+                document.write(html);
+                document.close();
+            });
+        })
+        .catch(function() {
+            showJob({ status: "error", error: "Could not reach the server." });
+        });
+}